@@ -0,0 +1,332 @@
+import argparse
+import hashlib
+import json
+import os
+from sys import argv
+
+ANALYSIS_VERSION = 1
+PROGRAM_START = 0x200
+CODE_END = 0xf00
+SKIPS = (0x3, 0x4, 0x5, 0x9)
+ALU_MNEMONICS = {
+    0x0: 'LD', 0x1: 'OR', 0x2: 'AND', 0x3: 'XOR', 0x4: 'ADD', 0x5: 'SUB',
+    0x6: 'SHR', 0x7: 'SUBN', 0xe: 'SHL',
+}
+MEMORY_MNEMONICS = {
+    0x07: 'LD V{:X}, DT', 0x0a: 'LD V{:X}, K', 0x15: 'LD DT, V{:X}',
+    0x18: 'LD ST, V{:X}', 0x1e: 'ADD I, V{:X}', 0x29: 'LD F, V{:X}',
+    0x33: 'LD B, V{:X}', 0x55: 'LD [I], V{:X}', 0x65: 'LD V{:X}, [I]',
+}
+
+
+def mnemonic(instruction):
+    group = instruction >> 0x0c
+    x = (instruction & 0x0f00) >> 0x08
+    y = (instruction & 0x00f0) >> 0x04
+    address = instruction & 0x0fff
+    value = instruction & 0x00ff
+    mode = instruction & 0x000f
+    if instruction == 0x00e0:
+        return 'CLS'
+    elif instruction == 0x00ee:
+        return 'RET'
+    elif group == 0x0:
+        return 'SYS 0x{:03x}'.format(address)
+    elif group == 0x1:
+        return 'JP 0x{:03x}'.format(address)
+    elif group == 0x2:
+        return 'CALL 0x{:03x}'.format(address)
+    elif group == 0x3:
+        return 'SE V{:X}, 0x{:02x}'.format(x, value)
+    elif group == 0x4:
+        return 'SNE V{:X}, 0x{:02x}'.format(x, value)
+    elif group == 0x5 and mode == 0x0:
+        return 'SE V{:X}, V{:X}'.format(x, y)
+    elif group == 0x6:
+        return 'LD V{:X}, 0x{:02x}'.format(x, value)
+    elif group == 0x7:
+        return 'ADD V{:X}, 0x{:02x}'.format(x, value)
+    elif group == 0x8 and mode in ALU_MNEMONICS:
+        return '{} V{:X}, V{:X}'.format(ALU_MNEMONICS[mode], x, y)
+    elif group == 0x9 and mode == 0x0:
+        return 'SNE V{:X}, V{:X}'.format(x, y)
+    elif group == 0xa:
+        return 'LD I, 0x{:03x}'.format(address)
+    elif group == 0xb:
+        return 'JP V0, 0x{:03x}'.format(address)
+    elif group == 0xc:
+        return 'RND V{:X}, 0x{:02x}'.format(x, value)
+    elif group == 0xd:
+        return 'DRW V{:X}, V{:X}, {}'.format(x, y, mode)
+    elif group == 0xe and value == 0x9e:
+        return 'SKP V{:X}'.format(x)
+    elif group == 0xe and value == 0xa1:
+        return 'SKNP V{:X}'.format(x)
+    elif group == 0xf and value in MEMORY_MNEMONICS:
+        return MEMORY_MNEMONICS[value].format(x)
+    return 'DW 0x{:04x}'.format(instruction)
+
+
+def successors(address, instruction):
+    group = instruction >> 0x0c
+    value = instruction & 0x00ff
+    if instruction == 0x00ee or group in (0x1, 0xb):
+        return []
+    if group in SKIPS or group == 0xe and value in (0x9e, 0xa1):
+        return [address + 2, address + 4]
+    return [address + 2]
+
+
+class Analysis:
+    def __init__(self, program_hash, start=PROGRAM_START, size=0):
+        self.program_hash = program_hash
+        self.start = start
+        self.size = size
+        self.instructions = {}
+        self.blocks = {}
+        self.jumps = []
+        self.calls = []
+        self.computed_jumps = []
+        self.references = []
+        self.data = []
+        self.self_modifying = []
+        self.unknown_writes = []
+
+    def to_dict(self):
+        return {
+            'version': ANALYSIS_VERSION,
+            'program_hash': self.program_hash,
+            'start': self.start,
+            'size': self.size,
+            'instructions': sorted(self.instructions.items()),
+            'blocks': sorted(self.blocks.items()),
+            'jumps': self.jumps,
+            'calls': self.calls,
+            'computed_jumps': self.computed_jumps,
+            'references': self.references,
+            'data': self.data,
+            'self_modifying': self.self_modifying,
+            'unknown_writes': self.unknown_writes,
+        }
+
+    @staticmethod
+    def from_dict(values):
+        analysis = Analysis(values['program_hash'], values['start'],
+                            values['size'])
+        analysis.instructions = dict(values['instructions'])
+        analysis.blocks = dict(values['blocks'])
+        for name in ('jumps', 'calls', 'computed_jumps', 'references',
+                     'unknown_writes'):
+            setattr(analysis, name, values[name])
+        analysis.data = [tuple(region) for region in values['data']]
+        analysis.self_modifying = [tuple(region)
+                                   for region in values['self_modifying']]
+        return analysis
+
+    def to_listing(self, program):
+        labels = {address: 'loc_{:03x}'.format(address)
+                  for address in self.jumps + self.computed_jumps}
+        labels.update({address: 'sub_{:03x}'.format(address)
+                       for address in self.calls})
+        labels[self.start] = 'start'
+        lines = []
+        data = {start: end for start, end in self.data}
+        address = self.start
+        end = self.start + self.size
+        while address < end:
+            if address in data:
+                lines += data_lines(program, self.start, address,
+                                    data[address])
+                address = data[address]
+                continue
+            instruction = self.instructions.get(address)
+            if instruction is None:
+                address += 1
+                continue
+            if address in labels:
+                lines.append('{}:'.format(labels[address]))
+            lines.append('    0x{:03x}  {:04x}  {}'.format(
+                address, instruction, mnemonic(instruction)))
+            address += 2
+        for start, end in self.self_modifying:
+            lines.append('; writes into code: 0x{:03x}-0x{:03x}'.format(
+                start, end - 1))
+        for address in self.unknown_writes:
+            lines.append('; write with unknown I: 0x{:03x}'.format(address))
+        return '\n'.join(lines) + '\n'
+
+
+def data_lines(program, start, address, end):
+    lines = []
+    for row in range(address, end, 8):
+        values = program[row - start: min(row + 8, end) - start]
+        lines.append('    0x{:03x}  db {}'.format(
+            row, ' '.join('{:02x}'.format(value) for value in values)))
+    return lines
+
+
+def program_hash(program):
+    return hashlib.sha1(bytes(program)).hexdigest()
+
+
+def analyze(program, start=PROGRAM_START):
+    program = bytes(program)
+    analysis = Analysis(program_hash(program), start, len(program))
+    memory = bytearray(0x1000)
+    memory[start: start + len(program)] = program
+    leaders = {start}
+    jumps, calls, computed, references = set(), set(), set(), set()
+    pending = [start]
+    while pending:
+        address = pending.pop()
+        if address in analysis.instructions or address + 1 >= CODE_END:
+            continue
+        instruction = (memory[address] << 8) + memory[address + 1]
+        analysis.instructions[address] = instruction
+        group = instruction >> 0x0c
+        target = instruction & 0x0fff
+        following = successors(address, instruction)
+        if group == 0x1:
+            jumps.add(target)
+            following = [target]
+        elif group == 0x2:
+            calls.add(target)
+            following.append(target)
+        elif group == 0xb:
+            computed.add(target)
+            following = [target]
+        elif group == 0xa:
+            references.add(target)
+        if following != [address + 2]:
+            leaders.update(following)
+        pending += following
+    analysis.jumps = sorted(jumps)
+    analysis.calls = sorted(calls)
+    analysis.computed_jumps = sorted(computed)
+    analysis.references = sorted(references)
+    analysis.blocks = find_blocks(analysis.instructions, leaders)
+    analysis.data = find_data(analysis.instructions, start, len(program))
+    find_writes(analysis)
+    return analysis
+
+
+def find_blocks(instructions, leaders):
+    blocks = {}
+    for leader in sorted(leaders):
+        if leader not in instructions:
+            continue
+        address = leader
+        length = 0
+        while address in instructions:
+            length += 1
+            instruction = instructions[address]
+            if successors(address, instruction) != [address + 2] or \
+                    instruction >> 0x0c == 0x2 or address + 2 in leaders:
+                break
+            address += 2
+        blocks[leader] = length
+    return blocks
+
+
+def find_data(instructions, start, size):
+    code = bytearray(size)
+    for address in instructions:
+        for offset in (address - start, address - start + 1):
+            if 0 <= offset < size:
+                code[offset] = 1
+    regions = []
+    offset = 0
+    while offset < size:
+        if code[offset]:
+            offset += 1
+            continue
+        end = code.find(1, offset)
+        end = size if end < 0 else end
+        regions.append((start + offset, start + end))
+        offset = end
+    return regions
+
+
+def find_writes(analysis):
+    written = []
+    for leader, length in analysis.blocks.items():
+        index = None
+        for address in range(leader, leader + 2 * length, 2):
+            instruction = analysis.instructions[address]
+            group = instruction >> 0x0c
+            value = instruction & 0x00ff
+            count = ((instruction & 0x0f00) >> 0x08) + 1
+            if group == 0xa:
+                index = instruction & 0x0fff
+            elif group == 0xf and value in (0x33, 0x55):
+                size = 3 if value == 0x33 else count
+                if index is None:
+                    analysis.unknown_writes.append(address)
+                else:
+                    written.append((index, index + size))
+                if value == 0x55 and index is not None:
+                    index += count
+            elif group == 0xf and value == 0x65 and index is not None:
+                index += count
+            elif group == 0xf and value in (0x1e, 0x29):
+                index = None
+    code = set()
+    for address in analysis.instructions:
+        code.update((address, address + 1))
+    for start, end in sorted(set(written)):
+        if any(address in code for address in range(start, end)):
+            analysis.self_modifying.append((start, end))
+    analysis.unknown_writes.sort()
+
+
+def get_cache_directory():
+    base = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'chip8')
+
+
+def load_analysis(program, cache_directory=None):
+    if cache_directory is None:
+        return analyze(program)
+    path = os.path.join(cache_directory,
+                        '{}.json'.format(program_hash(program)))
+    try:
+        with open(path, 'r') as file:
+            values = json.load(file)
+        if values.get('version') == ANALYSIS_VERSION:
+            return Analysis.from_dict(values)
+    except (OSError, ValueError, KeyError):
+        pass
+    analysis = analyze(program)
+    try:
+        os.makedirs(cache_directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(analysis.to_dict(), file)
+    except OSError:
+        pass
+    return analysis
+
+
+def get_arguments(args):
+    parser = argparse.ArgumentParser(
+        prog='python -m chip8.analysis',
+        description='Disassemble a Chip8 program and show its structure.')
+    parser.add_argument('program')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--cache', help='directory for cached analyses')
+    return parser.parse_args(args)
+
+
+def main(args):
+    arguments = get_arguments(args)
+    with open(arguments.program, 'rb') as file:
+        program = file.read()
+    analysis = load_analysis(program, arguments.cache)
+    if arguments.json:
+        print(json.dumps(analysis.to_dict(), indent=2))
+    else:
+        print(analysis.to_listing(program), end='')
+
+
+if __name__ == '__main__':
+    main(argv[1:])
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+from chip8.analysis import analyze, load_analysis, mnemonic
+from chip8.chip8blockcpu import Chip8BlockCpu
+from chip8.chip8cpu import Chip8Cpu
+from chip8.chip8gpu import Chip8Gpu
+from chip8.chip8state import Chip8State
+
+PROGRAM = [
+    0x22, 0x0a,  # 0x200: call 0x20a
+    0x30, 0x01,  # 0x202: skip if V0 == 1
+    0x12, 0x00,  # 0x204: jump 0x200
+    0xB2, 0x14,  # 0x206: jump 0x214 + V0
+    0x00, 0x00,  # 0x208: unreachable
+    0xA2, 0x1a,  # 0x20a: I = 0x21a
+    0xF0, 0x33,  # 0x20c: BCD V0 into the sprite
+    0xA2, 0x02,  # 0x20e: I = 0x202
+    0xF0, 0x55,  # 0x210: store V0 over the skip
+    0x00, 0xee,  # 0x212: return
+    0xF0, 0x1E,  # 0x214: I += V0
+    0xF0, 0x55,  # 0x216: store V0 at unknown I
+    0x12, 0x18,  # 0x218: spin
+    0xF0, 0x90,  # 0x21a: sprite data
+    0x90, 0xF0,
+]
+
+
+class MnemonicTest(unittest.TestCase):
+    def test_instructions_are_named(self):
+        self.assertEqual('CLS', mnemonic(0x00e0))
+        self.assertEqual('CALL 0x20a', mnemonic(0x220a))
+        self.assertEqual('SE V3, 0x1f', mnemonic(0x331f))
+        self.assertEqual('SUBN VA, VB', mnemonic(0x8ab7))
+        self.assertEqual('DRW V0, V1, 5', mnemonic(0xd015))
+        self.assertEqual('LD V2, [I]', mnemonic(0xf265))
+
+    def test_unknown_instruction_is_data_word(self):
+        self.assertEqual('DW 0x5121', mnemonic(0x5121))
+
+
+class AnalysisTest(unittest.TestCase):
+    def setUp(self):
+        self.analysis = analyze(PROGRAM)
+
+    def test_only_reachable_instructions_are_decoded(self):
+        self.assertNotIn(0x208, self.analysis.instructions)
+        self.assertNotIn(0x21a, self.analysis.instructions)
+        self.assertEqual(0xf055, self.analysis.instructions[0x216])
+
+    def test_branch_targets_are_found(self):
+        self.assertEqual([0x200, 0x218], self.analysis.jumps)
+        self.assertEqual([0x20a], self.analysis.calls)
+        self.assertEqual([0x214], self.analysis.computed_jumps)
+        self.assertEqual([0x202, 0x21a], self.analysis.references)
+
+    def test_basic_blocks_start_at_leaders(self):
+        self.assertEqual({0x200: 1, 0x202: 1, 0x204: 1, 0x206: 1,
+                          0x20a: 5, 0x214: 2, 0x218: 1},
+                         self.analysis.blocks)
+
+    def test_unreachable_bytes_are_data(self):
+        self.assertEqual([(0x208, 0x20a), (0x21a, 0x21e)],
+                         self.analysis.data)
+
+    def test_writes_into_code_are_self_modifying(self):
+        self.assertEqual([(0x202, 0x203)], self.analysis.self_modifying)
+        self.assertEqual([0x216], self.analysis.unknown_writes)
+
+    def test_listing_labels_code_and_shows_data(self):
+        listing = self.analysis.to_listing(bytes(PROGRAM))
+        self.assertIn('sub_20a:\n    0x20a  a21a  LD I, 0x21a\n', listing)
+        self.assertIn('    0x21a  db f0 90 90 f0\n', listing)
+        self.assertIn('; writes into code: 0x202-0x202\n', listing)
+
+    def test_cached_analysis_is_read_back(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = load_analysis(PROGRAM, directory)
+            self.assertEqual(1, len(os.listdir(directory)))
+            second = load_analysis(PROGRAM, directory)
+        self.assertEqual(first.to_dict(), second.to_dict())
+        self.assertEqual(first.blocks, second.blocks)
+
+    def test_prepare_decodes_reachable_instructions(self):
+        state = Chip8State()
+        state.load_program(PROGRAM)
+        cpu = Chip8Cpu(state, lambda: 0, Chip8Gpu(state))
+        cpu.prepare(self.analysis)
+        self.assertIn(0xf033, cpu.operations)
+        self.assertNotIn(0xf090, cpu.operations)
+
+    def test_prepare_compiles_blocks_ahead(self):
+        state = Chip8State()
+        state.load_program(PROGRAM)
+        cpu = Chip8BlockCpu(state, lambda: 0, Chip8Gpu(state))
+        cpu.prepare(self.analysis)
+        blocks = len(cpu.blocks)
+        self.assertIn(0x200 << 8 | 1, cpu.blocks)
+        cpu.run(20)
+        self.assertGreater(blocks, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import argparse
+import importlib.util
+import os
+from sys import argv
+
+from chip8.analysis import analyze, get_cache_directory, program_hash
+from chip8.chip8blockcpu import block_length, block_source
+from chip8.chip8state import Chip8State
+
+AOT_VERSION = 3
+HEADER = '''# Generated by chip8.aot, do not edit.
+from chip8.chip8cpu import to_bcd
+
+PROGRAM_HASH = {hash!r}
+PROGRAM_SIZE = {size}
+SCHIP = {schip}
+'''
+
+
+def module_name(program, schip):
+    quirks = 'schip' if schip else 'chip8'
+    return 'rom_{}_{}_v{}'.format(program_hash(program), quirks,
+                                  AOT_VERSION)
+
+
+def is_static(start, length, analysis):
+    end = start + 2 * length
+    return not any(start < write_end and write_start < end
+                   for write_start, write_end in analysis.self_modifying)
+
+
+def block_starts(state, analysis):
+    lengths = {}
+    pending = list(analysis.blocks)
+    while pending:
+        start = pending.pop()
+        if start in lengths or start not in analysis.instructions:
+            continue
+        length = block_length(state, start)
+        if length:
+            lengths[start] = length
+            pending.append(start + 2 * length)
+    return sorted(lengths.items())
+
+
+def module_source(program, schip, analysis=None):
+    program = bytes(program)
+    if analysis is None:
+        analysis = analyze(program)
+    state = Chip8State()
+    state.load_program(program)
+    lines = [HEADER.format(hash=program_hash(program), size=len(program),
+                           schip=bool(schip))]
+    blocks = []
+    for start, length in block_starts(state, analysis):
+        if not is_static(start, length, analysis):
+            continue
+        name = 'block_{:03x}_{}'.format(start, length)
+        lines.append('')
+        lines.append(block_source(name, state.memory, start, length, schip))
+        blocks.append('    0x{:03x}: ({}, {}),'.format(start, length, name))
+    lines.append('')
+    lines.append('BLOCKS = {')
+    lines += blocks
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def compile_program(program, schip, cache_directory):
+    name = module_name(program, schip)
+    path = os.path.join(cache_directory, name + '.py')
+    if not os.path.exists(path):
+        os.makedirs(cache_directory, exist_ok=True)
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temporary, 'w') as file:
+            file.write(module_source(program, schip))
+        os.replace(temporary, path)
+    return path
+
+
+def load_module(program, schip, cache_directory):
+    path = compile_program(program, schip, cache_directory)
+    spec = importlib.util.spec_from_file_location(
+        module_name(program, schip), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_arguments(args):
+    parser = argparse.ArgumentParser(
+        prog='python -m chip8.aot',
+        description='Compile Chip8 programs into cached Python modules.')
+    parser.add_argument('programs', nargs='+')
+    parser.add_argument('--schip', action='store_true')
+    parser.add_argument('--cache', default=get_cache_directory(),
+                        help='directory for compiled modules')
+    return parser.parse_args(args)
+
+
+def main(args):
+    arguments = get_arguments(args)
+    for name in arguments.programs:
+        with open(name, 'rb') as file:
+            program = file.read()
+        print(compile_program(program, arguments.schip, arguments.cache))
+
+
+if __name__ == '__main__':
+    main(argv[1:])
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from chip8.analysis_test import PROGRAM as SELF_MODIFYING_PROGRAM
+from chip8.aot import load_module, module_source
+from chip8.chip8blockcpu import Chip8BlockCpu
+from chip8.chip8cpu import Chip8Cpu
+from chip8.chip8cpu_test import PROGRAM
+from chip8.chip8gpu import Chip8Gpu
+from chip8.chip8state import Chip8State
+from chip8.headless import run
+
+UNKNOWN_WRITE_PROGRAM = [
+    0xA2, 0x10,  # 0x200: I = 0x210
+    0x60, 0x00,  # 0x202: V0 = 0
+    0xF0, 0x1E,  # 0x204: I += V0
+    0x60, 0x12,  # 0x206: V0 = 0x12
+    0x61, 0x0c,  # 0x208: V1 = 0x0c
+    0xF1, 0x55,  # 0x20a: store jump 0x20c over the next instruction
+    0x12, 0x10,  # 0x20c: jump 0x210
+    0x00, 0x00,
+    0x60, 0x07,  # 0x210: V0 = 7, rewritten
+    0x12, 0x12,  # 0x212: spin
+]
+
+
+class AotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_module_has_function_per_block(self):
+        source = module_source(PROGRAM, False)
+        self.assertIn('def block_200_', source)
+        self.assertIn('def block_220_', source)
+        self.assertIn('BLOCKS = {', source)
+
+    def test_blocks_written_at_runtime_are_left_out(self):
+        source = module_source(SELF_MODIFYING_PROGRAM, False)
+        self.assertNotIn('def block_202_', source)
+        self.assertIn('def block_204_', source)
+
+    def test_module_is_cached_per_quirks(self):
+        load_module(PROGRAM, False, self.directory.name)
+        load_module(PROGRAM, False, self.directory.name)
+        load_module(PROGRAM, True, self.directory.name)
+        modules = [name for name in os.listdir(self.directory.name)
+                   if name.endswith('.py')]
+        self.assertEqual(2, len(modules))
+
+    def test_loaded_blocks_are_used(self):
+        state, cpu = self.given_cpu(PROGRAM)
+        self.assertIn('block_200_', ' '.join(self.module_blocks(cpu)))
+        cpu.compile = None
+        cpu.run(cpu.lengths[0x200])
+
+    def test_compiled_program_matches_interpreter(self):
+        for program in (PROGRAM, SELF_MODIFYING_PROGRAM,
+                        UNKNOWN_WRITE_PROGRAM):
+            for cycles in (7, 50, 333):
+                self.assert_matches_interpreter(program, cycles)
+
+    def test_write_into_code_drops_module_blocks(self):
+        state, cpu = self.given_cpu(UNKNOWN_WRITE_PROGRAM)
+        self.assertTrue(self.module_blocks(cpu))
+        cpu.run(6)
+        self.assertEqual(0x12, state.memory[0x210])
+        self.assertFalse(self.module_blocks(cpu))
+
+    def test_module_is_installed_again_after_reload(self):
+        state, cpu = self.given_cpu(UNKNOWN_WRITE_PROGRAM)
+        cpu.run(50)
+        state.load_program(UNKNOWN_WRITE_PROGRAM)
+        cpu.run(1)
+        self.assertIn('block_210_2', self.module_blocks(cpu))
+
+    def test_headless_aot_engine_matches_interpreter(self):
+        expected = run(SELF_MODIFYING_PROGRAM, frames=20)
+        result = run(SELF_MODIFYING_PROGRAM, frames=20, engine='aot',
+                     aot_cache=self.directory.name)
+        self.assertEqual(expected.screen_hash, result.screen_hash)
+
+    def given_cpu(self, program):
+        state = Chip8State()
+        state.load_program(program)
+        cpu = Chip8BlockCpu(state, lambda: 0x2a, Chip8Gpu(state))
+        cpu.load_module(load_module(program, False, self.directory.name))
+        return state, cpu
+
+    def module_blocks(self, cpu):
+        module = {block for _, block in cpu.module.BLOCKS.values()}
+        return [block.__name__ for block in cpu.blocks.values()
+                if block in module]
+
+    def assert_matches_interpreter(self, program, cycles):
+        expected = Chip8State()
+        expected.load_program(program)
+        Chip8Cpu(expected, lambda: 0x2a, Chip8Gpu(expected)).run(cycles)
+        state, cpu = self.given_cpu(program)
+        cpu.run(cycles)
+        self.assertEqual(expected.memory, state.memory)
+        self.assertEqual(expected.registers, state.registers)
+        for name in ('PC', 'I', 'SP', 'DT', 'ST', 'cycles'):
+            self.assertEqual(getattr(expected, name), getattr(state, name))
+
+
+if __name__ == '__main__':
+    unittest.main()
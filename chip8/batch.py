@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sys import argv
+
+from chip8.headless import CYCLES_PER_FRAME, ENGINES, run
+from chip8.recording import parse_script
+
+ROM_EXTENSIONS = ('.ch8', '.c8', '.rom')
+MANIFEST_KEYS = ('program', 'frames', 'seed', 'schip', 'input', 'engine',
+                 'cycles_per_frame', 'aot_cache')
+
+
+class BatchJob:
+    def __init__(self, program, frames=600, seed=0, schip=False, script=(),
+                 engine='interpreter', cycles_per_frame=CYCLES_PER_FRAME,
+                 aot_cache=None, error=None):
+        self.program = program
+        self.frames = frames
+        self.seed = seed
+        self.schip = schip
+        self.script = list(script)
+        self.engine = engine
+        self.cycles_per_frame = cycles_per_frame
+        self.aot_cache = aot_cache
+        self.error = error
+
+
+def find_roms(directory):
+    names = sorted(os.listdir(directory))
+    return [os.path.join(directory, name) for name in names
+            if name.lower().endswith(ROM_EXTENSIONS)]
+
+
+def load_manifest(lines, base='.', **defaults):
+    jobs = []
+    for entry in json.loads(''.join(lines)):
+        error = manifest_error(entry)
+        if error is not None:
+            jobs.append(BatchJob(entry.get('program'), error=error))
+            continue
+        settings = dict(defaults)
+        settings.update(entry)
+        settings['program'] = os.path.join(base, settings['program'])
+        if 'input' in settings:
+            path = os.path.join(base, settings.pop('input'))
+            with open(path, 'r') as file:
+                settings['script'] = parse_script(file.readlines())
+        jobs.append(BatchJob(**settings))
+    return jobs
+
+
+def manifest_error(entry):
+    unknown = sorted(set(entry) - set(MANIFEST_KEYS))
+    if unknown:
+        return 'ManifestError: unknown keys {}'.format(', '.join(unknown))
+    if 'program' not in entry:
+        return 'ManifestError: no program given'
+    return None
+
+
+def run_job(job):
+    result = {'program': job.program, 'error': job.error}
+    start = time.perf_counter()
+    if job.error is not None:
+        result['wall_time'] = 0.0
+        return result
+    try:
+        with open(job.program, 'rb') as file:
+            program = file.read()
+        outcome = run(program,
+                      frames=job.frames,
+                      seed=job.seed,
+                      schip=job.schip,
+                      script=job.script,
+                      engine=job.engine,
+                      cycles_per_frame=job.cycles_per_frame,
+                      aot_cache=job.aot_cache)
+        result.update(outcome.to_dict())
+        del result['frame_hashes']
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+    result['wall_time'] = time.perf_counter() - start
+    return result
+
+
+def run_batch(jobs, workers=None):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def get_jobs(arguments):
+    script = []
+    if arguments.input:
+        with open(arguments.input, 'r') as file:
+            script = parse_script(file.readlines())
+    defaults = {
+        'frames': arguments.frames,
+        'seed': arguments.seed,
+        'schip': arguments.schip,
+        'script': script,
+        'engine': arguments.engine,
+        'cycles_per_frame': arguments.cycles_per_frame,
+        'aot_cache': arguments.aot_cache,
+    }
+    if os.path.isdir(arguments.source):
+        return [BatchJob(path, **defaults)
+                for path in find_roms(arguments.source)]
+    with open(arguments.source, 'r') as file:
+        base = os.path.dirname(arguments.source)
+        return load_manifest(file.readlines(), base, **defaults)
+
+
+def get_arguments(args):
+    parser = argparse.ArgumentParser(
+        prog='python -m chip8.batch',
+        description='Run many Chip8 programs headless in parallel.')
+    parser.add_argument('source',
+                        help='directory of ROMs or JSON manifest file')
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--schip', action='store_true')
+    parser.add_argument('--input', help='file with "frame key down|up" lines')
+    parser.add_argument('--engine', choices=sorted(ENGINES),
+                        default='interpreter')
+    parser.add_argument('--cycles-per-frame', type=int,
+                        default=CYCLES_PER_FRAME)
+    parser.add_argument('--aot-cache',
+                        help='directory for modules compiled by the aot '
+                             'engine, ~/.cache/chip8 by default')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes, all cores by default')
+    return parser.parse_args(args)
+
+
+def main(args):
+    arguments = get_arguments(args)
+    for result in run_batch(get_jobs(arguments), arguments.workers):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == '__main__':
+    main(argv[1:])
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+
+from chip8.batch import BatchJob, find_roms, load_manifest, run_batch, run_job
+from chip8.headless import run
+
+SPIN_PROGRAM = [0x60, 0x01, 0xF0, 0x29, 0xD0, 0x05, 0x12, 0x06]
+WAIT_PROGRAM = [0xF0, 0x0A, 0x12, 0x00]
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.spin = self.write('spin.ch8', SPIN_PROGRAM)
+        self.wait = self.write('wait.ch8', WAIT_PROGRAM)
+        self.write('notes.txt', b'not a rom')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'wb') as file:
+            file.write(bytes(content))
+        return path
+
+    def test_find_roms_skips_other_files(self):
+        self.assertEqual([self.spin, self.wait],
+                         find_roms(self.directory.name))
+
+    def test_manifest_paths_are_relative_to_base(self):
+        manifest = json.dumps([{'program': 'spin.ch8', 'frames': 5}])
+        jobs = load_manifest([manifest], self.directory.name, seed=3)
+        self.assertEqual(self.spin, jobs[0].program)
+        self.assertEqual(5, jobs[0].frames)
+        self.assertEqual(3, jobs[0].seed)
+
+    def test_manifest_loads_input_script(self):
+        self.write('keys.txt', b'2 4 down\n')
+        manifest = json.dumps([{'program': 'wait.ch8', 'input': 'keys.txt'}])
+        jobs = load_manifest([manifest], self.directory.name)
+        self.assertEqual([(2, 0x4, True)], jobs[0].script)
+
+    def test_unknown_manifest_key_fails_only_its_job(self):
+        manifest = json.dumps([{'program': 'spin.ch8', 'frame': 5},
+                               {'program': 'wait.ch8', 'frames': 5}])
+        jobs = load_manifest([manifest], self.directory.name)
+        results = [run_job(job) for job in jobs]
+        self.assertEqual('spin.ch8', results[0]['program'])
+        self.assertIn('unknown keys frame', results[0]['error'])
+        self.assertIsNone(results[1]['error'])
+        self.assertEqual(45, results[1]['cycles'])
+
+    def test_manifest_entry_without_program_is_reported(self):
+        jobs = load_manifest([json.dumps([{'frames': 5}])])
+        self.assertIn('no program', run_job(jobs[0])['error'])
+
+    def test_job_result_matches_headless_run(self):
+        result = run_job(BatchJob(self.spin, frames=10))
+        expected = run(SPIN_PROGRAM, frames=10)
+        self.assertEqual(expected.screen_hash, result['screen_hash'])
+        self.assertEqual(90, result['cycles'])
+        self.assertIsNone(result['error'])
+
+    def test_job_reports_key_wait(self):
+        result = run_job(BatchJob(self.wait, frames=10))
+        self.assertTrue(result['waiting_for_key'])
+
+    def test_missing_program_is_reported_as_error(self):
+        result = run_job(BatchJob(self.spin + '.missing'))
+        self.assertIn('FileNotFoundError', result['error'])
+
+    def test_batch_returns_result_for_every_job(self):
+        jobs = [BatchJob(self.spin, frames=5), BatchJob(self.wait, frames=5)]
+        results = list(run_batch(jobs, workers=2))
+        programs = sorted(result['program'] for result in results)
+        self.assertEqual([self.spin, self.wait], programs)
+
+
+if __name__ == '__main__':
+    unittest.main()
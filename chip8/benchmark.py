@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import time
+from sys import argv, exit
+
+from chip8.blitter import blit_screen, blit_screen_loop, \
+    blit_screen_numpy
+from chip8.chip8blockcpu import Chip8BlockCpu
+from chip8.chip8cpu import Chip8Cpu
+from chip8.chip8gpu import Chip8Gpu
+from chip8.chip8state import ALL_ROWS, Chip8State
+
+BATCH = 900
+REGRESSION = '{}: {:.0f} {}/s, baseline {:.0f} {}/s ({:+.1%})'
+
+ALU_PROGRAM = [
+    0x60, 0x35,  # V0 = 0x35
+    0x61, 0xa7,  # V1 = 0xa7
+    0x82, 0x10,  # V2 = V1
+    0x82, 0x01,  # V2 |= V0
+    0x82, 0x02,  # V2 &= V0
+    0x82, 0x03,  # V2 ^= V0
+    0x82, 0x14,  # V2 += V1
+    0x82, 0x05,  # V2 -= V0
+    0x82, 0x16,  # V2 = V1 >> 1
+    0x82, 0x17,  # V2 = V1 - V2
+    0x82, 0x1e,  # V2 = V1 << 1
+    0x12, 0x04,  # jump 0x204
+]
+
+BLOCK_COPY_PROGRAM = [
+    0xA4, 0x00,  # I = 0x400
+    0xFF, 0x55,  # M[I] = V0..VF
+    0xA4, 0x00,  # I = 0x400
+    0xFF, 0x65,  # V0..VF = M[I]
+    0x12, 0x00,  # jump 0x200
+]
+
+CALL_RETURN_PROGRAM = [
+    0x22, 0x04,  # 0x200: call 0x204
+    0x12, 0x00,  # 0x202: jump 0x200
+    0x22, 0x08,  # 0x204: call 0x208
+    0x00, 0xee,  # 0x206: return
+    0x22, 0x0c,  # 0x208: call 0x20c
+    0x00, 0xee,  # 0x20a: return
+    0x70, 0x01,  # 0x20c: V0 += 1
+    0x00, 0xee,  # 0x20e: return
+]
+
+
+def draw_program(x):
+    return [
+        0x60, x,     # V0 = x
+        0x61, 0x00,  # V1 = 0
+        0xA0, 0x00,  # I = sprite 0
+        0xD0, 0x1f,  # draw 15 rows at V0, V1
+        0x71, 0x01,  # V1 += 1
+        0x12, 0x06,  # jump 0x206
+    ]
+
+
+def cpu_benchmark(program, engine):
+    def setup():
+        state = Chip8State()
+        state.load_program(program)
+        cpu = engine(state, lambda: 0x2a, Chip8Gpu(state))
+        return lambda: cpu.run(BATCH), BATCH
+    return setup
+
+
+def tick_benchmark(program):
+    def setup():
+        state = Chip8State()
+        state.load_program(program)
+        tick = Chip8Cpu(state, lambda: 0x2a, Chip8Gpu(state)).tick
+
+        def step():
+            for _ in range(BATCH):
+                tick()
+        return step, BATCH
+    return setup
+
+
+def random_screen_state():
+    state = Chip8State()
+    for i in range(state.screen_buffer_length):
+        state.memory[state.screen_buffer_start + i] = (i * 73) & 0xff
+    return state
+
+
+def blit_benchmark(blit):
+    def setup():
+        import numpy
+        state = random_screen_state()
+        array = numpy.zeros((64, 32))
+        return lambda: blit(state, 0x003200, 0x00ff00, array), 1
+    return setup
+
+
+def scale_and_blit_benchmark():
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    import pygame
+    state = random_screen_state()
+    window = pygame.Surface((800, 600), 0, 32)
+    screen_surface = pygame.Surface((64, 32), 0, window)
+    area = pygame.Rect(80, 140, 640, 320)
+
+    def direct_step():
+        array = pygame.surfarray.pixels2d(window)[
+            area.left: area.right, area.top: area.bottom]
+        blit_screen(state, 0x003200, 0x00ff00, array, ALL_ROWS, 10)
+        del array
+
+    def step():
+        array = pygame.PixelArray(screen_surface)
+        blit_screen(state, 0x003200, 0x00ff00, array)
+        del array
+        pygame.transform.scale(screen_surface, area.size,
+                               window.subsurface(area))
+    if blit_screen is blit_screen_numpy:
+        return direct_step, 1
+    return step, 1
+
+
+BENCHMARKS = {}
+for name, rom in (('alu', ALU_PROGRAM),
+                  ('draw_aligned', draw_program(0x08)),
+                  ('draw_unaligned', draw_program(0x0b)),
+                  ('block_copy', BLOCK_COPY_PROGRAM),
+                  ('call_return', CALL_RETURN_PROGRAM)):
+    BENCHMARKS[name + '.tick'] = (tick_benchmark(rom), 'instructions')
+    BENCHMARKS[name + '.run'] = (cpu_benchmark(rom, Chip8Cpu),
+                                 'instructions')
+    BENCHMARKS[name + '.block'] = (cpu_benchmark(rom, Chip8BlockCpu),
+                                   'instructions')
+BENCHMARKS['blit_screen'] = (blit_benchmark(blit_screen), 'frames')
+BENCHMARKS['blit_screen_loop'] = (blit_benchmark(blit_screen_loop),
+                                  'frames')
+BENCHMARKS['scale_and_blit'] = (scale_and_blit_benchmark, 'frames')
+
+
+def measure(setup, min_time=0.2, repeat=3):
+    step, units = setup()
+    step()
+    best = 0.0
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            step()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, calls * units / elapsed)
+    return best
+
+
+def run_benchmarks(names=None, min_time=0.2, repeat=3):
+    results = {}
+    for name in names or sorted(BENCHMARKS):
+        setup, unit = BENCHMARKS[name]
+        try:
+            rate = measure(setup, min_time, repeat)
+        except ImportError as e:
+            print('Skipping {}: {}'.format(name, e))
+            continue
+        results[name] = {'rate': rate, 'unit': unit}
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        expected = baseline[name]['rate']
+        change = result['rate'] / expected - 1
+        if change < -threshold:
+            regressions.append(REGRESSION.format(
+                name, result['rate'], result['unit'],
+                expected, result['unit'], change))
+    return regressions
+
+
+def get_arguments(args):
+    parser = argparse.ArgumentParser(
+        prog='python -m chip8.benchmark',
+        description='Measure emulator speed.')
+    parser.add_argument('names', nargs='*',
+                        help='benchmarks to run, all by default')
+    parser.add_argument('--list', action='store_true')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='compare with stored results')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed slowdown against baseline')
+    parser.add_argument('--min-time', type=float, default=0.2)
+    parser.add_argument('--repeat', type=int, default=3)
+    return parser.parse_args(args)
+
+
+def main(args):
+    arguments = get_arguments(args)
+    if arguments.list:
+        print('\n'.join(sorted(BENCHMARKS)))
+        return 0
+    results = run_benchmarks(arguments.names, arguments.min_time,
+                             arguments.repeat)
+    print(json.dumps(results, indent=2, sort_keys=True))
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if arguments.baseline:
+        with open(arguments.baseline, 'r') as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline,
+                                       arguments.threshold)
+        for regression in regressions:
+            print('Regression: ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main(argv[1:]))
@@ -0,0 +1,29 @@
+import unittest
+
+from chip8.benchmark import BENCHMARKS, find_regressions, run_benchmarks
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_every_benchmark_reports_positive_rate(self):
+        results = run_benchmarks(min_time=0.001, repeat=1)
+        self.assertEqual(sorted(BENCHMARKS), sorted(results))
+        for result in results.values():
+            self.assertGreater(result['rate'], 0)
+
+    def test_slowdown_above_threshold_is_regression(self):
+        results = {'alu.run': {'rate': 80.0, 'unit': 'instructions'}}
+        baseline = {'alu.run': {'rate': 100.0, 'unit': 'instructions'}}
+        self.assertEqual(1, len(find_regressions(results, baseline, 0.1)))
+
+    def test_slowdown_within_threshold_is_accepted(self):
+        results = {'alu.run': {'rate': 95.0, 'unit': 'instructions'}}
+        baseline = {'alu.run': {'rate': 100.0, 'unit': 'instructions'}}
+        self.assertEqual([], find_regressions(results, baseline, 0.1))
+
+    def test_benchmarks_missing_from_baseline_are_ignored(self):
+        results = {'alu.run': {'rate': 1.0, 'unit': 'instructions'}}
+        self.assertEqual([], find_regressions(results, {}, 0.1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,53 @@
-def blit_screen(state, color1, color2, outArray):
+from chip8.chip8state import ALL_ROWS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def blit_screen_loop(state, color1, color2, outArray, rows=ALL_ROWS):
     for y in range(0x20):
+        if not rows >> y & 1:
+            continue
         for x in range(0x00, 0x40, 0x08):
             index = (y << 3) + (x >> 3) + state.screen_buffer_start
             byte = state.memory[index]
             for i in range(0x08):
                 pixel = byte & (0x80 >> i)
                 outArray[x + i, y] = color1 if pixel == 0 else color2
+
+
+def blit_screen_numpy(state, color1, color2, outArray, rows=ALL_ROWS,
+                      scale=1):
+    screen = np.frombuffer(state.memory, np.uint8, 0x100,
+                           state.screen_buffer_start)
+    palette = np.array((color1, color2), outArray.dtype)
+    for top, height in dirty_bands(rows):
+        pixels = np.unpackbits(screen[top << 3: (top + height) << 3])
+        pixels = pixels.reshape(height, 1, 0x40, 1)
+        # splitting both axes of the target gives a view with one cell per
+        # scaled pixel, so the palette broadcasts straight into it; setting
+        # the shape raises where reshape would silently copy
+        target = outArray[:, top * scale: (top + height) * scale].T.view()
+        target.shape = (height, scale, 0x40, scale)
+        target[:] = palette[pixels]
+
+
+blit_screen = blit_screen_loop if np is None else blit_screen_numpy
+
+
+def dirty_bands(rows):
+    bands = []
+    y = 0
+    while rows:
+        if rows & 1:
+            top = y
+            while rows & 1:
+                rows >>= 1
+                y += 1
+            bands.append((top, y - top))
+        else:
+            rows >>= 1
+            y += 1
+    return bands
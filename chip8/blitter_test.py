@@ -1,15 +1,18 @@
 import unittest
 import numpy
-from chip8.blitter import blit_screen
+from chip8.blitter import blit_screen, blit_screen_loop, \
+    blit_screen_numpy, dirty_bands
 
 
 class StateMock:
     def __init__(self):
         self.screen_buffer_start = 0
-        self.memory = [0] * 0x100
+        self.memory = bytearray(0x100)
 
 
 class BlitterTest(unittest.TestCase):
+    blit = staticmethod(blit_screen_loop)
+
     def setUp(self):
         self.state = StateMock()
         self.color1 = 0x000000
@@ -17,32 +20,91 @@ class BlitterTest(unittest.TestCase):
         self.array = numpy.ndarray((64, 32))
 
     def test_zeros_mapped_to_color1(self):
-        blit_screen(self.state, self.color1, self.color2, self.array)
+        self.blit(self.state, self.color1, self.color2, self.array)
         for x in range(self.array.shape[0]):
             for y in range(self.array.shape[1]):
                 self.assertEqual(self.color1, self.array[x, y])
 
     def test_255_mapped_to_color2(self):
         self.state.memory[:] = [0xff] * 0x100
-        blit_screen(self.state, self.color1, self.color2, self.array)
+        self.blit(self.state, self.color1, self.color2, self.array)
         for x in range(self.array.shape[0]):
             for y in range(self.array.shape[1]):
                 self.assertEqual(self.color2, self.array[x, y])
 
     def test_screen_buffer_start_is_used(self):
-        self.state.memory = [0x0] * 0x100 + [0xff] * 0x100
+        self.state.memory = bytearray(0x100) + b'\xff' * 0x100
         self.state.screen_buffer_start = 0x100
-        blit_screen(self.state, self.color1, self.color2, self.array)
+        self.blit(self.state, self.color1, self.color2, self.array)
         for x in range(self.array.shape[0]):
             for y in range(self.array.shape[1]):
                 self.assertEqual(self.color2, self.array[x, y])
 
     def test_0xaa_is_bit_mapped(self):
         self.state.memory[0] = 0xaa
-        blit_screen(self.state, self.color1, self.color2, self.array)
+        self.blit(self.state, self.color1, self.color2, self.array)
         self.assertEqual(self.color2, self.array[0, 0])
         self.assertEqual(self.color1, self.array[1, 0])
 
+    def test_only_dirty_rows_are_drawn(self):
+        self.state.memory[:] = [0xff] * 0x100
+        self.array.fill(self.color1)
+        self.blit(self.state, self.color1, self.color2, self.array, 0b101)
+        self.assertEqual(self.color2, self.array[0, 0])
+        self.assertEqual(self.color1, self.array[0, 1])
+        self.assertEqual(self.color2, self.array[63, 2])
+        self.assertEqual(self.color1, self.array[63, 3])
+
+    def test_pixel_order_within_row(self):
+        self.state.memory[0x08: 0x10] = bytes((1, 0, 0, 0, 0, 0, 0, 2))
+        self.blit(self.state, self.color1, self.color2, self.array)
+        self.assertEqual(self.color2, self.array[7, 1])
+        self.assertEqual(self.color1, self.array[6, 1])
+        self.assertEqual(self.color2, self.array[62, 1])
+        self.assertEqual(self.color1, self.array[63, 1])
+
+
+class NumpyBlitterTest(BlitterTest):
+    blit = staticmethod(blit_screen_numpy)
+
+    def test_matches_loop_on_every_row(self):
+        self.state.memory[:] = bytes((i * 73) & 0xff for i in range(0x100))
+        expected = numpy.zeros((64, 32))
+        blit_screen_loop(self.state, self.color1, self.color2, expected)
+        self.blit(self.state, self.color1, self.color2, self.array)
+        numpy.testing.assert_array_equal(expected, self.array)
+
+    def test_scale_repeats_every_pixel(self):
+        self.state.memory[0x08] = 0x80
+        array = numpy.zeros((64 * 3, 32 * 3))
+        self.blit(self.state, self.color1, self.color2, array, 0b10, 3)
+        self.assertEqual(9, numpy.count_nonzero(array == self.color2))
+        self.assertTrue((array[0:3, 3:6] == self.color2).all())
+        self.assertTrue((array[:, :3] == 0).all())
+
+    def test_strided_target_is_written_in_place(self):
+        self.state.memory[0] = 0x80
+        window = numpy.zeros((80, 40))
+        self.blit(self.state, self.color1, self.color2, window[8:72, 4:36])
+        self.assertEqual(self.color2, window[8, 4])
+        self.assertEqual(self.color1, window[9, 4])
+        self.assertEqual(0, window[7, 4])
+
+    def test_default_when_numpy_installed(self):
+        self.assertIs(blit_screen_numpy, blit_screen)
+
+
+class DirtyBandsTest(unittest.TestCase):
+    def test_no_rows_no_bands(self):
+        self.assertEqual([], dirty_bands(0))
+
+    def test_neighbouring_rows_are_merged(self):
+        self.assertEqual([(0, 2), (3, 1), (29, 3)],
+                         dirty_bands(0b111 << 29 | 0b1011))
+
+    def test_all_rows_are_one_band(self):
+        self.assertEqual([(0, 32)], dirty_bands(0xffffffff))
+
 
 if __name__ == '__main__':
     unittest.main()
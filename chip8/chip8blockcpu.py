@@ -0,0 +1,350 @@
+from chip8.analysis import PROGRAM_START, program_hash
+from chip8.chip8cpu import Chip8Cpu, to_bcd
+
+MAX_BLOCK_LENGTH = 0x40
+
+
+class Chip8BlockCpu(Chip8Cpu):
+    def __init__(self, state, rng, gpu):
+        super().__init__(state, rng, gpu)
+        self.blocks = {}
+        self.lengths = {}
+        self.idle_jumps = {}
+        self.code = bytearray(len(state.memory))
+        self.code_version = state.code_version
+        self.compiled_schip = self.schip
+        self.module = None
+
+    def tick(self):
+        self.run(1)
+
+    def run(self, cycles):
+        state = self.state
+        self.check_code()
+        blocks = self.blocks
+        lengths = self.lengths
+        idle_jumps = self.idle_jumps
+        end = state.cycles + cycles
+        idle = False
+        while cycles > 0:
+            pc = state.PC
+            length = lengths.get(pc)
+            if length is None:
+                length = self.measure(pc)
+            target = idle_jumps.get(pc)
+            if target is not None:
+                idle = target == pc
+                cycles = self.skip_idle_loop(target, cycles)
+                continue
+            if length == 0:
+                Chip8Cpu.tick(self)
+                cycles -= 1
+                continue
+            if length > cycles:
+                length = cycles
+            block = blocks.get(pc << 8 | length)
+            if block is None:
+                block = self.compile(pc, length)
+            if block(self):
+                idle = True
+                break
+            cycles -= length
+        state.cycles = end
+        self.update_timers()
+        return idle
+
+    def check_code(self):
+        outdated = self.state.code_version != self.code_version
+        if outdated or self.schip != self.compiled_schip:
+            self.invalidate_all()
+
+    def prepare(self, analysis):
+        self.check_code()
+        super().prepare(analysis)
+        for start in analysis.blocks:
+            length = self.lengths.get(start)
+            if length is None:
+                length = self.measure(start)
+            if length and start << 8 | length not in self.blocks:
+                self.compile(start, length)
+
+    def load_module(self, module):
+        self.module = module
+        self.invalidate_all()
+
+    def install_module(self):
+        module = self.module
+        if module is None or module.SCHIP != self.schip:
+            return
+        memory = self.state.memory
+        code = memory[PROGRAM_START: PROGRAM_START + module.PROGRAM_SIZE]
+        if program_hash(code) != module.PROGRAM_HASH:
+            return
+        for start, (length, block) in module.BLOCKS.items():
+            measured = self.lengths.get(start)
+            if measured is None:
+                measured = self.measure(start)
+            if measured == length:
+                self.blocks[start << 8 | length] = block
+
+    def measure(self, start):
+        length = block_length(self.state, start)
+        self.lengths[start] = length
+        self.code[start: start + 2 * length] = b'\x01' * (2 * length)
+        memory = self.state.memory
+        if length and memory[start] >> 0x04 == 0x1:
+            target = ((memory[start] & 0x0f) << 8) + memory[start + 1]
+            self.find_idle_jump(start, target)
+        return length
+
+    def find_idle_jump(self, start, target):
+        if target == start:
+            self.idle_jumps[start] = target
+        elif target == start - 4 and self.is_delay_loop(target):
+            self.idle_jumps[start] = target
+            self.code[target: start] = b'\x01' * 4
+
+    def compile(self, start, length):
+        name = 'block_{:03x}_{}'.format(start, length)
+        source = block_source(name, self.state.memory, start, length,
+                              self.schip)
+        namespace = dict(BLOCK_GLOBALS)
+        exec(compile(source, '<{}>'.format(name), 'exec'), namespace)
+        block = namespace[name]
+        self.blocks[start << 8 | length] = block
+        return block
+
+    def invalidate(self, start, end):
+        super().invalidate(start, end)
+        if any(self.code[start:end]):
+            self.invalidate_all()
+
+    def invalidate_all(self):
+        self.blocks.clear()
+        self.lengths.clear()
+        self.idle_jumps.clear()
+        self.code = bytearray(len(self.state.memory))
+        self.code_version = self.state.code_version
+        self.compiled_schip = self.schip
+        self.install_module()
+
+
+BLOCK_GLOBALS = {'to_bcd': to_bcd}
+
+
+def is_terminator(instruction):
+    group = instruction >> 0x0c
+    low = instruction & 0x00ff
+    if instruction == 0x00ee or group in (0x1, 0x2, 0x3, 0x4, 0xb):
+        return True
+    if group in (0x5, 0x9):
+        return instruction & 0x000f == 0x0
+    if group == 0xe:
+        return low in (0x9e, 0xa1)
+    if group == 0xf:
+        return low in (0x0a, 0x33, 0x55)
+    return False
+
+
+def block_length(state, start):
+    memory = state.memory
+    end = min(state.screen_buffer_start, len(memory) - 1)
+    length = 0
+    address = start
+    while address < end and length < MAX_BLOCK_LENGTH:
+        length += 1
+        if is_terminator((memory[address] << 8) + memory[address + 1]):
+            break
+        address += 2
+    return length
+
+
+def block_source(name, memory, start, length, schip):
+    lines = [
+        'def {}(cpu):'.format(name),
+        '    state = cpu.state',
+        '    V = state.registers',
+        '    M = state.memory',
+    ]
+    pending = 0
+    next_pc = start + 2 * length
+    for i in range(length):
+        pc = start + 2 * i
+        instruction = (memory[pc] << 8) + memory[pc + 1]
+        if i < length - 1 or not is_terminator(instruction):
+            if touches_timers(instruction):
+                lines += count_cycles(pending)
+                pending = 0
+            lines += straight_line(instruction, schip)
+            pending += 1
+            continue
+        if instruction & 0xf0ff == 0xf00a:
+            lines += count_cycles(pending)
+            pending = 0
+        lines += terminator(instruction, pc)
+        pending += 1
+        next_pc = None
+    lines += count_cycles(pending)
+    if next_pc is not None:
+        lines.append('    state.PC = {}'.format(next_pc))
+    return '\n'.join(lines) + '\n'
+
+
+def touches_timers(instruction):
+    return instruction & 0xf0ff in (0xf007, 0xf015, 0xf018)
+
+
+def count_cycles(cycles):
+    if cycles == 0:
+        return []
+    return ['    state.cycles += {}'.format(cycles)]
+
+
+def straight_line(instruction, schip):
+    group = instruction >> 0x0c
+    x = (instruction & 0x0f00) >> 0x08
+    y = (instruction & 0x00f0) >> 0x04
+    address = instruction & 0x0fff
+    value = instruction & 0x00ff
+    mode = instruction & 0x000f
+    if instruction == 0x00e0:
+        return ['    cpu.clear_screen()']
+    elif group == 0x6:
+        return ['    V[{}] = {}'.format(x, value)]
+    elif group == 0x7:
+        return ['    V[{0}] = (V[{0}] + {1}) & 0xff'.format(x, value)]
+    elif group == 0x8:
+        return alu(x, y, mode, schip)
+    elif group == 0xa:
+        return ['    state.I = {}'.format(address)]
+    elif group == 0xc:
+        return ['    V[{}] = cpu.rng() & {}'.format(x, value)]
+    elif group == 0xd:
+        return ['    cpu.gpu.draw(state.I, V[{}] & 0x3f, V[{}] & 0x1f, {})'
+                .format(x, y, mode)]
+    elif group == 0xf:
+        return memory_operation(x, value)
+    return []
+
+
+def alu(x, y, mode, schip):
+    shifted = x if schip else y
+    if mode == 0x0:
+        return ['    V[{}] = V[{}]'.format(x, y)]
+    elif mode == 0x1:
+        return ['    V[{}] |= V[{}]'.format(x, y)]
+    elif mode == 0x2:
+        return ['    V[{}] &= V[{}]'.format(x, y)]
+    elif mode == 0x3:
+        return ['    V[{}] ^= V[{}]'.format(x, y)]
+    elif mode == 0x4:
+        return [
+            '    a = V[{}]'.format(x),
+            '    r = (a + V[{}]) & 0xff'.format(y),
+            '    V[15] = 1 if r < a else 0',
+            '    V[{}] = r'.format(x),
+        ]
+    elif mode == 0x5 or mode == 0x7:
+        minuend, subtrahend = (x, y) if mode == 0x5 else (y, x)
+        return [
+            '    r = V[{}] - V[{}]'.format(minuend, subtrahend),
+            '    V[15] = 0 if r < 0 else 1',
+            '    V[{}] = r & 0xff'.format(x),
+        ]
+    elif mode == 0x6:
+        return [
+            '    v = V[{}]'.format(shifted),
+            '    V[{}] = v >> 1'.format(x),
+            '    V[15] = v & 0x01',
+        ]
+    elif mode == 0xe:
+        return [
+            '    v = V[{}]'.format(shifted),
+            '    V[{}] = (v << 1) & 0xff'.format(x),
+            '    V[15] = v >> 7',
+        ]
+    return []
+
+
+def memory_operation(x, mode):
+    if mode == 0x07:
+        return ['    cpu.update_timers()', '    V[{}] = state.DT'.format(x)]
+    elif mode == 0x15:
+        return ['    cpu.update_timers()', '    state.DT = V[{}]'.format(x)]
+    elif mode == 0x18:
+        return ['    cpu.write_sound_timer(V[{}])'.format(x)]
+    elif mode == 0x1e:
+        return ['    state.I += V[{}]'.format(x)]
+    elif mode == 0x29:
+        return ['    state.I = V[{}] * 5'.format(x)]
+    elif mode == 0x65:
+        return [
+            '    i = state.I',
+            '    V[:{0}] = M[i: i + {0}]'.format(x + 1),
+            '    state.I = i + {}'.format(x + 1),
+        ]
+    return []
+
+
+def terminator(instruction, pc):
+    group = instruction >> 0x0c
+    x = (instruction & 0x0f00) >> 0x08
+    y = (instruction & 0x00f0) >> 0x04
+    address = instruction & 0x0fff
+    value = instruction & 0x00ff
+    if instruction == 0x00ee:
+        return [
+            '    state.SP -= 1',
+            '    state.PC = state.stack[state.SP] + 2',
+        ]
+    elif group == 0x1:
+        return ['    state.PC = {}'.format(address)]
+    elif group == 0x2:
+        return [
+            '    state.stack[state.SP] = {}'.format(pc),
+            '    state.SP += 1',
+            '    state.PC = {}'.format(address),
+        ]
+    elif group == 0x3:
+        return skip('V[{}] == {}'.format(x, value), pc)
+    elif group == 0x4:
+        return skip('V[{}] != {}'.format(x, value), pc)
+    elif group == 0x5:
+        return skip('V[{}] == V[{}]'.format(x, y), pc)
+    elif group == 0x9:
+        return skip('V[{}] != V[{}]'.format(x, y), pc)
+    elif group == 0xb:
+        return ['    state.PC = {} + V[0]'.format(address)]
+    elif value == 0x9e:
+        return skip('cpu.is_key_pressed(V[{}])'.format(x), pc)
+    elif value == 0xa1:
+        return skip('not cpu.is_key_pressed(V[{}])'.format(x), pc)
+    elif value == 0x0a:
+        return [
+            '    key = cpu.get_key_pressed()',
+            '    if key is None:',
+            '        state.PC = {}'.format(pc),
+            '        return True',
+            '    V[{}] = key'.format(x),
+            '    state.PC = {}'.format(pc + 2),
+        ]
+    elif value == 0x33:
+        return [
+            '    i = state.I',
+            '    M[i: i + 3] = to_bcd(V[{}])'.format(x),
+            '    state.PC = {}'.format(pc + 2),
+            '    cpu.invalidate(i, i + 3)',
+        ]
+    return [
+        '    i = state.I',
+        '    M[i: i + {0}] = V[:{0}]'.format(x + 1),
+        '    state.I = i + {}'.format(x + 1),
+        '    state.PC = {}'.format(pc + 2),
+        '    cpu.invalidate(i, i + {})'.format(x + 1),
+    ]
+
+
+def skip(condition, pc):
+    return [
+        '    state.PC = {} if {} else {}'.format(pc + 4, condition, pc + 2),
+    ]
@@ -0,0 +1,160 @@
+import unittest
+
+from chip8 import chip8cpu_test
+from chip8.chip8blockcpu import Chip8BlockCpu
+from chip8.chip8cpu import Chip8Cpu
+from chip8.chip8gpu import Chip8Gpu
+from chip8.chip8state import Chip8State
+
+
+PROGRAM = [
+    0x60, 0x05,  # V0 = 5
+    0x61, 0x00,  # V1 = 0
+    0xA3, 0x00,  # I = 0x300
+    0x71, 0x03,  # V1 += 3
+    0x81, 0x04,  # V1 += V0
+    0x82, 0x16,  # V2 = V1 >> 1
+    0xF1, 0x33,  # BCD V1
+    0xF2, 0x65,  # V0..V2 = M[I]
+    0xD0, 0x15,  # draw
+    0xC3, 0x7f,  # V3 = rnd
+    0xF3, 0x15,  # DT = V3
+    0xF4, 0x07,  # V4 = DT
+    0x22, 0x20,  # call 0x220
+    0x12, 0x06,  # jump 0x206
+    0x00, 0x00,
+    0x00, 0x00,
+    0x85, 0x45,  # 0x220: V5 -= V4
+    0x35, 0x10,  # skip if V5 == 0x10
+    0x00, 0xee,  # return
+    0x00, 0xee,  # return
+]
+
+
+class BlockCpuTest(chip8cpu_test.CpuTest):
+    def setUp(self):
+        super().setUp()
+        self.cpu = Chip8BlockCpu(self.state, self.get_random_mock, self.gpu)
+
+    def test_instruction_decoded_once(self):
+        self.when_instruction_is(0x200, 0x7C01)
+        self.when_instruction_is(0x202, 0x7C01)
+        self.cpu.tick()
+        block = self.cpu.blocks[0x200 << 8 | 1]
+        self.when_pc_is(0x200)
+        self.cpu.tick()
+        self.assertIs(block, self.cpu.blocks[0x200 << 8 | 1])
+        self.assertEqual(0x02, self.state.registers[0xC])
+
+
+class BlockCpuRunMatchesTicksTest(chip8cpu_test.CpuRunTest):
+    def setUp(self):
+        super().setUp()
+        self.cpu = Chip8BlockCpu(self.state, lambda: 0x2a, self.cpu.gpu)
+
+
+class BlockCpuRunTest(unittest.TestCase):
+    def setUp(self):
+        self.random_numbers = iter(range(0x1000))
+        self.state = Chip8State()
+        self.gpu = Chip8Gpu(self.state)
+        self.cpu = Chip8BlockCpu(self.state, self.rng, self.gpu)
+
+    def rng(self):
+        return next(self.random_numbers) & 0xff
+
+    def test_run_matches_interpreter(self):
+        for cycles in (1, 7, 9, 100, 1000):
+            expected = self.run_interpreter(PROGRAM, cycles)
+            self.setUp()
+            self.state.load_program(PROGRAM)
+            self.cpu.run(cycles)
+            self.assert_same_state(expected, self.state)
+
+    def test_run_in_small_batches_matches_interpreter(self):
+        expected = self.run_interpreter(PROGRAM, 900)
+        self.state.load_program(PROGRAM)
+        for _ in range(100):
+            self.cpu.run(9)
+        self.assert_same_state(expected, self.state)
+
+    def test_store_registers_into_code_invalidates_block(self):
+        self.state.load_program([
+            0x60, 0x61,  # V0 = 0x61
+            0x61, 0x2a,  # V1 = 0x2a
+            0xA2, 0x08,  # I = 0x208
+            0xF1, 0x55,  # M[0x208] = V0, V1
+            0x61, 0x00,  # V1 = 0, rewritten to V1 = 0x2a
+            0x12, 0x0a,  # loop
+        ])
+        self.cpu.run(4)
+        self.cpu.run(2)
+        self.assertEqual(0x2a, self.state.registers[0x1])
+
+    def test_store_bcd_into_code_invalidates_block(self):
+        self.state.load_program([
+            0x72, 0x05,  # 0x200: V2 += 5, rewritten to V2 += 0
+            0x12, 0x08,  # 0x202: jump 0x208
+            0x00, 0x00,
+            0x00, 0x00,
+            0x60, 0x19,  # 0x208: V0 = 25
+            0xA2, 0x01,  # 0x20a: I = 0x201
+            0xF0, 0x33,  # 0x20c: M[0x201] = 0x00, 0x02, 0x05
+            0x12, 0x00,  # 0x20e: jump 0x200
+        ])
+        self.cpu.run(2)
+        self.cpu.run(4)
+        self.cpu.run(1)
+        self.assertEqual(0x202, self.state.PC)
+        self.assertEqual(0x05, self.state.registers[0x2])
+
+    def test_load_program_invalidates_blocks(self):
+        self.state.load_program([0x60, 0x01, 0x12, 0x00])
+        self.cpu.run(2)
+        self.state.load_program([0x60, 0x02, 0x12, 0x00])
+        self.cpu.run(2)
+        self.assertEqual(0x02, self.state.registers[0x0])
+
+    def test_schip_change_recompiles_blocks(self):
+        self.state.load_program([0x61, 0x08, 0x80, 0x16, 0x12, 0x00])
+        self.state.registers[0x0] = 0x20
+        self.cpu.run(3)
+        self.assertEqual(0x04, self.state.registers[0x0])
+        self.cpu.schip = True
+        self.cpu.run(3)
+        self.assertEqual(0x02, self.state.registers[0x0])
+
+    def test_halt_on_key_wait_keeps_pc(self):
+        self.state.load_program([0x60, 0x01, 0xF1, 0x0A, 0x12, 0x00])
+        self.cpu.run(5)
+        self.assertEqual(0x202, self.state.PC)
+        self.state.keys[0x7] = True
+        self.cpu.run(1)
+        self.assertEqual(0x204, self.state.PC)
+        self.assertEqual(0x07, self.state.registers[0x1])
+
+    def run_interpreter(self, program, cycles):
+        self.random_numbers = iter(range(0x1000))
+        state = Chip8State()
+        cpu = Chip8Cpu(state, self.rng, Chip8Gpu(state))
+        state.load_program(program)
+        for _ in range(cycles):
+            cpu.tick()
+        self.random_numbers = iter(range(0x1000))
+        return state
+
+    def assert_same_state(self, expected, actual):
+        self.assertEqual(expected.memory, actual.memory)
+        self.assertEqual(expected.registers, actual.registers)
+        self.assertEqual(expected.stack, actual.stack)
+        self.assertEqual(expected.PC, actual.PC)
+        self.assertEqual(expected.SP, actual.SP)
+        self.assertEqual(expected.I, actual.I)
+        self.assertEqual(expected.DT, actual.DT)
+        self.assertEqual(expected.ST, actual.ST)
+        self.assertEqual(expected.cycles, actual.cycles)
+        self.assertEqual(expected.timer_tick, actual.timer_tick)
+
+
+if __name__ == '__main__':
+    unittest.main()
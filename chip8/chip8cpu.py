@@ -1,5 +1,9 @@
+from functools import partial
 from math import floor
 
+CLOCK_SPEED = 600
+TIMER_RATE = 60
+
 
 class Chip8Cpu:
     def __init__(self, state, rng, gpu):
@@ -7,64 +11,263 @@ class Chip8Cpu:
         self.rng = rng
         self.gpu = gpu
         self.schip = False
+        self.clock_speed = CLOCK_SPEED
+        self.timer_rate = TIMER_RATE
+        self.operations = {}
+        self.sound_edges = None
 
     def tick(self):
-        byte1 = self.state.memory[self.state.PC]
-        byte2 = self.state.memory[self.state.PC + 1]
-        instruction = (byte1 << 8) + byte2
+        memory = self.state.memory
+        pc = self.state.PC
+        instruction = (memory[pc] << 8) + memory[pc + 1]
+        operation = self.operations.get(instruction)
+        if operation is None:
+            operation = self.decode(instruction)
+            self.operations[instruction] = operation
+        if not operation():
+            self.state.PC += 2
+        self.state.cycles += 1
+        self.update_timers()
+
+    def run(self, cycles):
+        state = self.state
+        memory = state.memory
+        registers = state.registers
+        stack = state.stack
+        operations = self.operations
+        pc = state.PC
+        index = state.I
+        sp = state.SP
+        end = state.cycles + cycles
+        idle = False
+        while cycles > 0:
+            cycles -= 1
+            instruction = (memory[pc] << 8) + memory[pc + 1]
+            group = instruction >> 0x0c
+            if group == 0x6:
+                registers[(instruction >> 0x08) & 0xf] = instruction & 0xff
+            elif group == 0x7:
+                register = (instruction >> 0x08) & 0xf
+                sum = registers[register] + (instruction & 0xff)
+                registers[register] = sum & 0xff
+            elif group == 0xa:
+                index = instruction & 0x0fff
+            elif group == 0x1:
+                target = instruction & 0x0fff
+                if target == pc or target == pc - 4 and \
+                        self.is_delay_loop(target):
+                    idle = target == pc
+                    state.PC = pc
+                    state.cycles = end - cycles - 1
+                    cycles = self.skip_idle_loop(target, cycles + 1)
+                    pc = state.PC
+                    continue
+                pc = target - 2
+            elif group == 0x3:
+                register = (instruction >> 0x08) & 0xf
+                if registers[register] == instruction & 0xff:
+                    pc += 2
+            elif group == 0x4:
+                register = (instruction >> 0x08) & 0xf
+                if registers[register] != instruction & 0xff:
+                    pc += 2
+            elif group == 0x2:
+                stack[sp] = pc
+                sp += 1
+                pc = (instruction & 0x0fff) - 2
+            elif instruction == 0x00ee:
+                sp -= 1
+                pc = stack[sp]
+            else:
+                operation = operations.get(instruction)
+                if operation is None:
+                    operation = self.decode(instruction)
+                    operations[instruction] = operation
+                state.PC = pc
+                state.I = index
+                state.SP = sp
+                state.cycles = end - cycles - 1
+                halted = operation()
+                pc = state.PC
+                index = state.I
+                sp = state.SP
+                if halted:
+                    idle = True
+                    break
+            pc += 2
+        state.PC = pc
+        state.I = index
+        state.SP = sp
+        state.cycles = end
+        self.update_timers()
+        return idle
+
+    def prepare(self, analysis):
+        operations = self.operations
+        for instruction in analysis.instructions.values():
+            if instruction not in operations:
+                operations[instruction] = self.decode(instruction)
+
+    def is_delay_loop(self, address):
+        memory = self.state.memory
+        read = (memory[address] << 8) + memory[address + 1]
+        test = (memory[address + 2] << 8) + memory[address + 3]
+        return read & 0xf0ff == 0xf007 and test == 0x3000 | (read & 0x0f00)
+
+    def skip_idle_loop(self, target, cycles):
+        state = self.state
+        if target == state.PC:
+            state.cycles += cycles
+            return 0
+        state.PC = target
+        state.cycles += 1
+        return cycles - 1 - self.skip_delay_loop(cycles - 1)
+
+    def skip_delay_loop(self, cycles):
+        state = self.state
+        self.update_timers()
+        if state.DT == 0:
+            return 0
+        until_zero = self.cycles_until_timer_ticks(state.DT)
+        iterations = min(cycles // 3, (until_zero + 2) // 3)
+        if iterations:
+            register = state.memory[state.PC] & 0x0f
+            last_read = state.cycles + 3 * iterations - 3
+            state.registers[register] = \
+                state.DT - self.timer_ticks(last_read)
+            state.cycles += 3 * iterations
+        return 3 * iterations
+
+    def timer_ticks(self, cycles):
+        elapsed = cycles * self.timer_rate - self.state.timer_tick
+        return max(elapsed, 0) // self.clock_speed
+
+    def cycles_until_timer_ticks(self, ticks):
+        state = self.state
+        deadline = state.timer_tick + ticks * self.clock_speed
+        return -(-deadline // self.timer_rate) - state.cycles
+
+    def set_clock_speed(self, clock_speed):
+        self.update_timers()
+        state = self.state
+        now = state.cycles * self.timer_rate
+        elapsed = max(now - state.timer_tick, 0)
+        # keep the part of the timer period that has already passed
+        state.timer_tick = now - elapsed * clock_speed // self.clock_speed
+        self.clock_speed = clock_speed
+
+    def update_timers(self):
+        state = self.state
+        ticks = self.timer_ticks(state.cycles)
+        if ticks:
+            if self.sound_edges is not None and 0 < state.ST <= ticks:
+                stop = state.cycles + self.cycles_until_timer_ticks(state.ST)
+                self.sound_edges.append((stop, False))
+            state.timer_tick += ticks * self.clock_speed
+            state.DT = max(state.DT - ticks, 0)
+            state.ST = max(state.ST - ticks, 0)
+
+    def decode(self, instruction):
         group = (instruction & 0xf000) >> 0x0c
         register1 = (instruction & 0x0f00) >> 0x08
         register2 = (instruction & 0x00f0) >> 0x04
         address = instruction & 0x0fff
         value = instruction & 0x00ff
         mode = instruction & 0x000f
-        halted = False
         if instruction == 0x00e0:
-            self.state.memory[-0x100:] = [0] * 0x100
+            return self.clear_screen
         elif instruction == 0x00ee:
-            self.state.PC = self.pop()
+            return self.return_from_subroutine
         elif group == 0x1:
-            self.state.PC = address - 2
+            return partial(self.jump, address)
         elif group == 0x2:
-            self.push(self.state.PC)
-            self.state.PC = address - 2
+            return partial(self.call, address)
         elif group == 0x3:
-            self.skip_if_equal(self.state.registers[register1], value)
+            return partial(self.skip_if_register_equals, register1, value)
         elif group == 0x4:
-            self.skip_if_not_equal(self.state.registers[register1], value)
-        elif group == 0x5 and instruction & 0x000f == 0x00:
-            self.skip_if_equal(
-                self.state.registers[register1],
-                self.state.registers[register2]
-            )
+            return partial(self.skip_if_register_differs, register1, value)
+        elif group == 0x5 and mode == 0x0:
+            return partial(self.skip_if_registers_equal, register1, register2)
         elif group == 0x6:
-            self.state.registers[register1] = value
+            return partial(self.load_value, register1, value)
         elif group == 0x7:
-            sum = (self.state.registers[register1] + value) & 0xff
-            self.state.registers[register1] = sum
+            return partial(self.add_value, register1, value)
         elif group == 0x8:
-            self.handle_alu(register1, register2, mode)
-        elif group == 0x9 and instruction & 0x000f == 0:
-            self.skip_if_not_equal(
-                self.state.registers[register1],
-                self.state.registers[register2]
-            )
+            return self.decode_alu(register1, register2, mode)
+        elif group == 0x9 and mode == 0x0:
+            return partial(self.skip_if_registers_differ, register1, register2)
         elif group == 0xa:
-            self.state.I = address
+            return partial(self.load_index, address)
         elif group == 0xb:
-            self.state.PC = address + self.state.registers[0x0] - 2
+            return partial(self.jump_with_offset, address)
         elif group == 0xc:
-            self.state.registers[register1] = self.rng() & value
+            return partial(self.load_random, register1, value)
         elif group == 0xd:
-            self.draw(register1, register2, mode)
+            return partial(self.draw, register1, register2, mode)
         elif group == 0xe:
-            self.handle_keyboard(register1, value)
+            return self.decode_keyboard(register1, value)
         elif group == 0xf:
-            halted = self.handle_memory_operation(register1, value)
+            return self.decode_memory_operation(register1, value)
+        return self.ignore
 
-        if not halted:
-            self.state.PC += 2
-            self.handle_timers()
+    def decode_alu(self, register1, register2, mode):
+        operations = {
+            0x0: self.move,
+            0x1: self.bitwise_or,
+            0x2: self.bitwise_and,
+            0x3: self.bitwise_xor,
+            0x4: self.add_registers,
+            0x5: self.subtract_registers,
+            0x6: self.shift_right,
+            0x7: self.subtract_registers_reversed,
+            0xe: self.shift_left,
+        }
+        if mode in operations:
+            return partial(operations[mode], register1, register2)
+        return self.ignore
+
+    def decode_keyboard(self, register, mode):
+        if mode == 0x9e:
+            return partial(self.skip_if_key_pressed, register)
+        elif mode == 0xa1:
+            return partial(self.skip_if_key_not_pressed, register)
+        return self.ignore
+
+    def decode_memory_operation(self, register, mode):
+        operations = {
+            0x07: self.load_delay_timer,
+            0x0a: self.halt_until_key_pressed,
+            0x15: self.set_delay_timer,
+            0x18: self.set_sound_timer,
+            0x1e: self.add_to_index,
+            0x29: self.load_font_sprite,
+            0x33: self.store_bcd,
+            0x55: self.store_registers,
+            0x65: self.load_registers,
+        }
+        if mode in operations:
+            return partial(operations[mode], register)
+        return self.ignore
+
+    def ignore(self):
+        pass
+
+    def clear_screen(self):
+        self.state.memory[-0x100:] = [0] * 0x100
+        self.state.mark_screen()
+
+    def return_from_subroutine(self):
+        self.state.PC = self.pop()
+
+    def jump(self, address):
+        self.state.PC = address - 2
+
+    def call(self, address):
+        self.push(self.state.PC)
+        self.state.PC = address - 2
+
+    def jump_with_offset(self, address):
+        self.state.PC = address + self.state.registers[0x0] - 2
 
     def push(self, number):
         self.state.stack[self.state.SP] = number
@@ -83,31 +286,75 @@ class Chip8Cpu:
         if value1 != value2:
             self.state.PC += 2
 
-    def handle_alu(self, register1, register2, mode):
-        value1 = self.state.registers[register1]
-        value2 = self.state.registers[register2]
-        if mode == 0x0:
-            self.state.registers[register1] = value2
-        elif mode == 0x1:
-            self.state.registers[register1] = value1 | value2
-        elif mode == 0x2:
-            self.state.registers[register1] = value1 & value2
-        elif mode == 0x3:
-            self.state.registers[register1] = value1 ^ value2
-        elif mode == 0x4:
-            self.state.registers[register1] = self.add(value1, value2)
-        elif mode == 0x5:
-            self.state.registers[register1] = self.subtract(value1, value2)
-        elif mode == 0x6:
-            value = value1 if self.schip else value2
-            self.state.registers[register1] = value >> 1
-            self.state.registers[0xf] = value & 0x01
-        elif mode == 0x7:
-            self.state.registers[register1] = self.subtract(value2, value1)
-        elif mode == 0xe:
-            value = value1 if self.schip else value2
-            self.state.registers[register1] = (value << 1) & 0xff
-            self.state.registers[0xf] = value >> 7
+    def skip_if_register_equals(self, register, value):
+        self.skip_if_equal(self.state.registers[register], value)
+
+    def skip_if_register_differs(self, register, value):
+        self.skip_if_not_equal(self.state.registers[register], value)
+
+    def skip_if_registers_equal(self, register1, register2):
+        self.skip_if_equal(
+            self.state.registers[register1],
+            self.state.registers[register2]
+        )
+
+    def skip_if_registers_differ(self, register1, register2):
+        self.skip_if_not_equal(
+            self.state.registers[register1],
+            self.state.registers[register2]
+        )
+
+    def load_value(self, register, value):
+        self.state.registers[register] = value
+
+    def add_value(self, register, value):
+        sum = (self.state.registers[register] + value) & 0xff
+        self.state.registers[register] = sum
+
+    def load_index(self, address):
+        self.state.I = address
+
+    def load_random(self, register, value):
+        self.state.registers[register] = self.rng() & value
+
+    def move(self, register1, register2):
+        self.state.registers[register1] = self.state.registers[register2]
+
+    def bitwise_or(self, register1, register2):
+        self.state.registers[register1] |= self.state.registers[register2]
+
+    def bitwise_and(self, register1, register2):
+        self.state.registers[register1] &= self.state.registers[register2]
+
+    def bitwise_xor(self, register1, register2):
+        self.state.registers[register1] ^= self.state.registers[register2]
+
+    def add_registers(self, register1, register2):
+        registers = self.state.registers
+        registers[register1] = self.add(
+            registers[register1], registers[register2])
+
+    def subtract_registers(self, register1, register2):
+        registers = self.state.registers
+        registers[register1] = self.subtract(
+            registers[register1], registers[register2])
+
+    def subtract_registers_reversed(self, register1, register2):
+        registers = self.state.registers
+        registers[register1] = self.subtract(
+            registers[register2], registers[register1])
+
+    def shift_right(self, register1, register2):
+        registers = self.state.registers
+        value = registers[register1 if self.schip else register2]
+        registers[register1] = value >> 1
+        registers[0xf] = value & 0x01
+
+    def shift_left(self, register1, register2):
+        registers = self.state.registers
+        value = registers[register1 if self.schip else register2]
+        registers[register1] = (value << 1) & 0xff
+        registers[0xf] = value >> 7
 
     def subtract(self, num1, num2):
         result = num1 - num2
@@ -126,42 +373,62 @@ class Chip8Cpu:
         y = self.state.registers[register2] & 0x1f
         self.gpu.draw(self.state.I, x, y, mode)
 
-    def handle_keyboard(self, register, mode):
-        key = self.state.registers[register]
-        if mode == 0x9e and self.is_key_pressed(key):
+    def skip_if_key_pressed(self, register):
+        if self.is_key_pressed(self.state.registers[register]):
             self.state.PC += 2
-        elif mode == 0xa1 and not self.is_key_pressed(key):
+
+    def skip_if_key_not_pressed(self, register):
+        if not self.is_key_pressed(self.state.registers[register]):
             self.state.PC += 2
 
-    def handle_memory_operation(self, register, mode):
-        halted = False
-        registerValue = self.state.registers[register]
-        if mode == 0x07:
-            self.state.registers[register] = self.state.DT
-        elif mode == 0x0a:
-            halted = self.halt_until_key_pressed(register)
-        elif mode == 0x15:
-            self.state.DT = registerValue
-        elif mode == 0x18:
-            self.state.ST = registerValue
-        elif mode == 0x1e:
-            self.state.I += registerValue
-        elif mode == 0x29:
-            self.state.I = registerValue * 5
-        elif mode == 0x33:
-            bcd = to_bcd(registerValue)
-            self.state.memory[self.state.I: self.state.I + 3] = bcd
-        elif mode == 0x55:
-            length = register + 1
-            subarray = self.state.registers[:length]
-            self.state.memory[self.state.I: self.state.I + length] = subarray
-            self.state.I += register + 1
-        elif mode == 0x65:
-            length = register + 1
-            subarray = self.state.memory[self.state.I: self.state.I + length]
-            self.state.registers[:length] = subarray
-            self.state.I += register + 1
-        return halted
+    def load_delay_timer(self, register):
+        self.update_timers()
+        self.state.registers[register] = self.state.DT
+
+    def set_delay_timer(self, register):
+        self.update_timers()
+        self.state.DT = self.state.registers[register]
+
+    def set_sound_timer(self, register):
+        self.write_sound_timer(self.state.registers[register])
+
+    def write_sound_timer(self, value):
+        self.update_timers()
+        state = self.state
+        if self.sound_edges is not None and (value > 0) != (state.ST > 0):
+            self.sound_edges.append((state.cycles, value > 0))
+        state.ST = value
+
+    def add_to_index(self, register):
+        self.state.I += self.state.registers[register]
+
+    def load_font_sprite(self, register):
+        self.state.I = self.state.registers[register] * 5
+
+    def store_bcd(self, register):
+        bcd = to_bcd(self.state.registers[register])
+        self.state.memory[self.state.I: self.state.I + 3] = bcd
+        self.invalidate(self.state.I, self.state.I + 3)
+
+    def store_registers(self, register):
+        length = register + 1
+        subarray = self.state.registers[:length]
+        self.state.memory[self.state.I: self.state.I + length] = subarray
+        self.invalidate(self.state.I, self.state.I + length)
+        self.state.I += length
+
+    def invalidate(self, start, end):
+        screen_start = self.state.screen_buffer_start
+        if end > screen_start:
+            first = max(start - screen_start, 0) >> 3
+            last = (end - 1 - screen_start) >> 3
+            self.state.mark_screen((2 << last) - (1 << first))
+
+    def load_registers(self, register):
+        length = register + 1
+        subarray = self.state.memory[self.state.I: self.state.I + length]
+        self.state.registers[:length] = subarray
+        self.state.I += length
 
     def halt_until_key_pressed(self, register):
         key = self.get_key_pressed()
@@ -170,14 +437,6 @@ class Chip8Cpu:
             return False
         return True
 
-    def handle_timers(self):
-        if self.state.timer_counter > 0:
-            self.state.timer_counter -= 1
-        else:
-            self.state.timer_counter = 9
-            self.state.DT = max(self.state.DT - 1, 0)
-            self.state.ST = max(self.state.ST - 1, 0)
-
     def get_key_pressed(self):
         for key, keyState in enumerate(self.state.keys):
             if keyState:
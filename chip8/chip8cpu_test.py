@@ -42,6 +42,28 @@ class CpuTest(unittest.TestCase):
         self.assertEqual(0x302, self.state.PC)
         self.assertEqual(0x00, self.state.SP)
 
+    def test_00e0_marks_screen_changed(self):
+        self.when_instruction_is(0x200, 0x00e0)
+        self.when_screen_is_presented()
+        self.cpu.tick()
+        self.assertEqual(0xffffffff, self.state.dirty_rows)
+        self.assertEqual(1, self.state.screen_version)
+
+    def test_fx55_into_screen_marks_written_rows(self):
+        self.when_instruction_is(0x200, 0xf355)
+        self.when_I_is(0xf0e)
+        self.when_screen_is_presented()
+        self.cpu.tick()
+        self.assertEqual(0b110, self.state.dirty_rows)
+
+    def test_fx33_outside_screen_marks_nothing(self):
+        self.when_instruction_is(0x200, 0xf033)
+        self.when_I_is(0xefd)
+        self.when_screen_is_presented()
+        self.cpu.tick()
+        self.assertEqual(0, self.state.dirty_rows)
+        self.assertEqual(0, self.state.screen_version)
+
     def test_0nnn_except_00ee_and_00e0_is_ignored(self):
         for i in range(0x000, 0x1000):
             if i != 0x00ee and i != 0x00e0:
@@ -402,48 +424,120 @@ class CpuTest(unittest.TestCase):
         self.assertEqual(0x304, self.state.I)
         self.assertEqual(0x1000, len(self.state.memory))
 
-    def test_tick_decreases_timer_counter(self):
-        self.when_timer_counter_is(0x05)
+    def test_tick_counts_cycles(self):
+        self.when_cycles_are(5)
         self.cpu.tick()
-        self.assertEqual(0x04, self.state.timer_counter)
+        self.assertEqual(6, self.state.cycles)
 
-    def test_dt_decrements_when_timer_counter_is_0(self):
-        self.when_timer_counter_is(0x00)
+    def test_dt_decrements_at_timer_deadline(self):
+        self.when_cycles_are(9)
         self.when_dt_is(0x02)
         self.cpu.tick()
-        self.assertEqual(0x09, self.state.timer_counter)
         self.assertEqual(0x01, self.state.DT)
 
+    def test_dt_stays_before_timer_deadline(self):
+        self.when_cycles_are(8)
+        self.when_dt_is(0x02)
+        self.cpu.tick()
+        self.assertEqual(0x02, self.state.DT)
+
     def test_dt_stays_at_0(self):
-        self.when_timer_counter_is(0x00)
+        self.when_cycles_are(9)
         self.when_dt_is(0x00)
         self.cpu.tick()
-        self.assertEqual(0x09, self.state.timer_counter)
         self.assertEqual(0x00, self.state.DT)
 
-    def test_st_decrements_when_timer_counter_is_0(self):
-        self.when_timer_counter_is(0x00)
+    def test_st_decrements_at_timer_deadline(self):
+        self.when_cycles_are(9)
         self.when_st_is(0x02)
         self.cpu.tick()
-        self.assertEqual(0x09, self.state.timer_counter)
         self.assertEqual(0x01, self.state.ST)
 
     def test_st_stays_at_0(self):
-        self.when_timer_counter_is(0x00)
+        self.when_cycles_are(9)
         self.when_st_is(0x00)
         self.cpu.tick()
-        self.assertEqual(0x09, self.state.timer_counter)
         self.assertEqual(0x00, self.state.ST)
 
-    def test_dt_not_upgraded_when_cpu_halted(self):
+    def test_timers_run_when_cpu_halted(self):
         self.when_instruction_is(0x200, 0xfa0a)
-        self.when_timer_counter_is(0x01)
+        self.when_cycles_are(9)
         self.when_dt_is(0x01)
         self.when_st_is(0x01)
         self.cpu.tick()
-        self.assertEqual(0x01, self.state.timer_counter)
-        self.assertEqual(0x01, self.state.DT)
-        self.assertEqual(0x01, self.state.ST)
+        self.assertEqual(0x200, self.state.PC)
+        self.assertEqual(10, self.state.cycles)
+        self.assertEqual(0x00, self.state.DT)
+        self.assertEqual(0x00, self.state.ST)
+
+    def test_timer_period_follows_clock_speed(self):
+        self.cpu.clock_speed = 120
+        self.when_dt_is(0x10)
+        for _ in range(6):
+            self.cpu.tick()
+        self.assertEqual(0x0d, self.state.DT)
+
+    def test_timer_period_can_be_fraction_of_cycle_count(self):
+        self.cpu.clock_speed = 150
+        self.when_dt_is(0x10)
+        for _ in range(10):
+            self.cpu.tick()
+        self.assertEqual(0x0c, self.state.DT)
+
+    def test_clock_speed_change_keeps_timer_phase(self):
+        self.cpu.clock_speed = 120
+        self.when_dt_is(0x10)
+        self.cpu.tick()
+        self.cpu.set_clock_speed(240)
+        self.cpu.tick()
+        self.assertEqual(0x10, self.state.DT)
+        self.cpu.tick()
+        self.assertEqual(0x0f, self.state.DT)
+        self.assertEqual(240, self.cpu.clock_speed)
+
+    def test_speed_raised_early_in_timer_period_survives_snapshot(self):
+        self.cpu.clock_speed = 120
+        self.when_dt_is(0x10)
+        self.state.cycles = 3
+        self.cpu.update_timers()
+        self.cpu.set_clock_speed(600)
+        self.state.restore(self.state.snapshot())
+        self.state.cycles += 4
+        self.cpu.update_timers()
+        self.assertEqual(0x0f, self.state.DT)
+        self.state.cycles += 1
+        self.cpu.update_timers()
+        self.assertEqual(0x0e, self.state.DT)
+
+    def test_timer_rate_is_independent_of_clock_speed(self):
+        self.cpu.timer_rate = 120
+        self.when_dt_is(0x10)
+        for _ in range(10):
+            self.cpu.tick()
+        self.assertEqual(0x0e, self.state.DT)
+
+    def test_instruction_decoded_once(self):
+        self.when_instruction_is(0x200, 0x7C01)
+        self.when_instruction_is(0x202, 0x7C01)
+        self.cpu.tick()
+        operation = self.cpu.operations[0x7C01]
+        self.cpu.tick()
+        self.assertIs(operation, self.cpu.operations[0x7C01])
+        self.assertEqual(0x02, self.state.registers[0xC])
+
+    def test_schip_mode_applies_to_decoded_instruction(self):
+        self.when_instruction_is(0x200, 0x8CB6)
+        self.when_instruction_is(0x202, 0x8CB6)
+        self.when_register_is(0xB, 0x08)
+        self.when_register_is(0xC, 0x20)
+        self.cpu.tick()
+        self.when_schip_mode_on()
+        self.cpu.tick()
+        self.assertEqual(0x02, self.state.registers[0xC])
+
+    def when_screen_is_presented(self):
+        self.state.dirty_rows = 0
+        self.state.screen_version = 0
 
     def when_instruction_is(self, address, instruction):
         instruction_bytes = [(instruction >> 8) & 0xff, instruction & 0xff]
@@ -487,8 +581,9 @@ class CpuTest(unittest.TestCase):
     def when_key_is_not_pressed(self, key):
         self.state.keys[key] = False
 
-    def when_timer_counter_is(self, value):
-        self.state.timer_counter = value
+    def when_cycles_are(self, value):
+        self.state.cycles = value
+        self.state.timer_tick = value // 10 * 600
 
     def when_schip_mode_on(self):
         self.cpu.schip = True
@@ -521,5 +616,124 @@ class CpuTest(unittest.TestCase):
         self.assertEqual(height, self.gpu.lastHeight)
 
 
+PROGRAM = [
+    0x60, 0x05,  # V0 = 5
+    0xA3, 0x00,  # I = 0x300
+    0x71, 0x03,  # V1 += 3
+    0x81, 0x04,  # V1 += V0
+    0xF1, 0x33,  # BCD V1
+    0xF2, 0x65,  # V0..V2 = M[I]
+    0x22, 0x20,  # call 0x220
+    0x41, 0x40,  # skip if V1 != 0x40
+    0x12, 0x04,  # jump 0x204
+    0x12, 0x10,  # jump 0x210
+    0x00, 0x00,
+    0x00, 0x00,
+    0x00, 0x00,
+    0x00, 0x00,
+    0x00, 0x00,
+    0x00, 0x00,
+    0x32, 0x10,  # 0x220: skip if V2 == 0x10
+    0x72, 0x01,  # V2 += 1
+    0xF2, 0x15,  # DT = V2
+    0x00, 0xee,  # return
+]
+
+
+class CpuRunTest(unittest.TestCase):
+    def setUp(self):
+        self.state = Chip8State()
+        self.cpu = Chip8Cpu(self.state, lambda: 0x2a, GpuMock())
+
+    def test_run_matches_ticks(self):
+        for cycles in (1, 9, 50, 500):
+            self.assert_run_matches_ticks(PROGRAM, cycles)
+
+    def test_run_skips_jump_to_itself(self):
+        program = [0x60, 0x30, 0xF0, 0x15, 0xF0, 0x18, 0x12, 0x06]
+        for cycles in range(1, 400, 7):
+            self.assert_run_matches_ticks(program, cycles)
+        self.assertTrue(self.cpu.run(10))
+
+    def test_run_skips_delay_timer_polling_loop(self):
+        program = [
+            0x6A, 0x07,  # VA = 7
+            0xFA, 0x15,  # DT = VA
+            0xFB, 0x07,  # 0x204: VB = DT
+            0x3B, 0x00,  # skip if VB == 0
+            0x12, 0x04,  # jump 0x204
+            0x7C, 0x01,  # VC += 1
+            0x12, 0x00,  # jump 0x200
+        ]
+        for cycles in range(1, 300):
+            self.assert_run_matches_ticks(program, cycles)
+        self.assertFalse(self.cpu.run(10))
+
+    def test_run_reports_key_wait_as_idle(self):
+        self.state.load_program([0xF1, 0x0A])
+        self.assertTrue(self.cpu.run(9))
+
+    def test_run_stops_at_key_wait(self):
+        self.state.load_program([0x60, 0x01, 0xF1, 0x0A, 0x12, 0x00])
+        self.state.DT = 5
+        self.cpu.run(25)
+        self.assertEqual(0x202, self.state.PC)
+        self.assertEqual(25, self.state.cycles)
+        self.assertEqual(3, self.state.DT)
+
+    def test_run_applies_timer_ticks_in_bulk(self):
+        self.state.load_program([0x60, 0x01, 0x12, 0x00])
+        self.state.DT = 10
+        self.state.ST = 3
+        self.cpu.run(45)
+        self.assertEqual(6, self.state.DT)
+        self.assertEqual(0, self.state.ST)
+        self.cpu.clock_speed = 1200
+        self.cpu.run(45)
+        self.assertEqual(4, self.state.DT)
+
+    def test_run_records_sound_timer_edges_at_their_cycle(self):
+        self.state.load_program([0x60, 0x02, 0xF0, 0x18, 0x12, 0x04])
+        self.cpu.sound_edges = []
+        self.cpu.run(45)
+        self.assertEqual([(1, True), (20, False)], self.cpu.sound_edges)
+
+    def test_reloading_running_sound_timer_is_no_edge(self):
+        self.state.load_program([0x60, 0x05, 0xF0, 0x18, 0x12, 0x04])
+        self.state.ST = 3
+        self.cpu.sound_edges = []
+        self.cpu.run(9)
+        self.assertEqual([], self.cpu.sound_edges)
+
+    def test_sound_timer_edges_not_recorded_by_default(self):
+        self.state.load_program([0x60, 0x02, 0xF0, 0x18, 0x12, 0x04])
+        self.cpu.run(45)
+        self.assertIsNone(self.cpu.sound_edges)
+
+    def test_run_writes_back_index_and_stack(self):
+        self.state.load_program([0xA1, 0x23, 0x22, 0x10])
+        self.cpu.run(2)
+        self.assertEqual(0x123, self.state.I)
+        self.assertEqual(0x210, self.state.PC)
+        self.assertEqual(1, self.state.SP)
+        self.assertEqual(0x202, self.state.stack[0])
+
+    def assert_run_matches_ticks(self, program, cycles):
+        expected = Chip8State()
+        cpu = Chip8Cpu(expected, lambda: 0x2a, GpuMock())
+        expected.load_program(program)
+        for _ in range(cycles):
+            cpu.tick()
+        self.setUp()
+        self.state.load_program(program)
+        self.cpu.run(cycles)
+        self.assertEqual(expected.memory, self.state.memory)
+        self.assertEqual(expected.registers, self.state.registers)
+        self.assertEqual(expected.stack, self.state.stack)
+        for name in ('PC', 'I', 'SP', 'DT', 'ST', 'cycles', 'timer_tick'):
+            self.assertEqual(getattr(expected, name),
+                             getattr(self.state, name))
+
+
 if __name__ == '__main__':
     unittest.main()
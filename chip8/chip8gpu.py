@@ -1,3 +1,14 @@
+# sprite bytes shifted into a 64-bit screen row, filled in for every x on
+# first use
+SPRITE_ROWS = [None] * 0x40
+
+
+def get_sprite_rows(x):
+    rows = [(byte << 0x38) >> x for byte in range(0x100)]
+    SPRITE_ROWS[x] = rows
+    return rows
+
+
 class Chip8Gpu:
     def __init__(self, state):
         self.state = state
@@ -5,22 +16,17 @@ class Chip8Gpu:
     def draw(self, address, x, y, height):
         x = x & 0x3f
         y = y & 0x1f
-        x_byte_shift = x >> 3
-        y_byte_shift = y << 3
-        shift_in_byte = x & 0x07
-        height = min(height, 0x20 - y)
-        start = self.state.screen_buffer_start + x_byte_shift + y_byte_shift
-        self.state.registers[0xf] = 0x00
-        for i in range(height):
-            sprite_byte = self.state.memory[address + i]
-            row_byte_shift = i << 3
-            self.draw_byte(start + row_byte_shift,
-                           sprite_byte >> shift_in_byte)
-            if x < 0x38:
-                self.draw_byte(start + row_byte_shift + 1,
-                               sprite_byte << (8 - shift_in_byte) & 0xff)
-
-    def draw_byte(self, address, byte):
-        self.state.memory[address] = self.state.memory[address] ^ byte
-        if self.state.memory[address] & byte != byte:
-            self.state.registers[0xf] = 0x01
+        state = self.state
+        sprite_bytes = state.memory[address: address + min(height, 0x20 - y)]
+        shifted = SPRITE_ROWS[x] or get_sprite_rows(x)
+        sprite = 0
+        for byte in sprite_bytes:
+            sprite = sprite << 0x40 | shifted[byte]
+        start = y << 3
+        end = start + (len(sprite_bytes) << 3)
+        screen = state.screen
+        rows = int.from_bytes(screen[start:end], 'big')
+        state.registers[0xf] = 0x01 if rows & sprite else 0x00
+        screen[start:end] = (rows ^ sprite).to_bytes(end - start, 'big')
+        state.dirty_rows |= ((1 << len(sprite_bytes)) - 1) << y
+        state.screen_version += 1
@@ -91,6 +91,44 @@ class Chip8GpuTest(unittest.TestCase):
         self.gpu.draw(0x400, 0x38, 0x1f, 0x1)
         self.assert_memory_column(0x1f * 0x08 + (0x38 >> 3), 0xff)
 
+    def test_rows_around_sprite_unchanged(self):
+        self.when_memory_is(0x400, 0xff, 0x81)
+        self.when_memory_is(self.state.screen_buffer_start + 0x0f, 0x11)
+        self.when_memory_is(self.state.screen_buffer_start + 0x27, 0x22)
+        self.when_memory_is(self.state.screen_buffer_start + 0x16, 0x33)
+        self.gpu.draw(0x400, 0x3c, 0x02, 2)
+        self.assert_memory_column(0x0f, 0x11, 0x0f, 0x08, 0x22)
+        self.assert_memory_column(0x16, 0x33)
+        self.assertEqual(0x00, self.state.registers[0xf])
+
+    def test_collision_found_in_any_row_of_sprite(self):
+        self.when_memory_is(0x400, 0x01, 0x02, 0x04)
+        self.when_memory_is(self.state.screen_buffer_start + 0x25, 0x40)
+        self.when_memory_is(self.state.screen_buffer_start + 0x2d, 0x02)
+        self.gpu.draw(0x400, 0x29, 0x03, 3)
+        self.assert_memory_column(0x1d, 0x00, 0x41, 0x00)
+        self.assert_memory_column(0x1e, 0x80, 0x00, 0x00)
+        self.assertEqual(0x01, self.state.registers[0xf])
+
+    def test_sprite_past_end_of_memory_draws_remaining_rows(self):
+        self.when_memory_is(0xffe, 0x80, 0x80)
+        self.gpu.draw(0xffe, 0, 0, 4)
+        self.assert_memory_column(0, 0x80, 0x80, 0x00)
+
+    def test_draw_marks_sprite_rows(self):
+        self.state.dirty_rows = 0
+        version = self.state.screen_version
+        self.when_memory_is(0x400, 0x01, 0x02)
+        self.gpu.draw(0x400, 0x05, 0x03, 2)
+        self.assertEqual(0b11000, self.state.dirty_rows)
+        self.assertEqual(version + 1, self.state.screen_version)
+
+    def test_draw_marks_only_visible_rows(self):
+        self.state.dirty_rows = 0
+        self.when_memory_is(0x400, 0x01, 0x02, 0x03)
+        self.gpu.draw(0x400, 0, 0x1f, 3)
+        self.assertEqual(0x80000000, self.state.dirty_rows)
+
     def when_memory_is(self, address, *values):
         self.state.memory[address: address + len(values)] = values
 
@@ -1,3 +1,7 @@
+import hashlib
+import struct
+from array import array
+
 CHIP8_STANDARD_FONT = [
     0xF0, 0x90, 0x90, 0x90, 0xF0,
     0x20, 0x60, 0x20, 0x20, 0x70,
@@ -17,38 +21,123 @@ CHIP8_STANDARD_FONT = [
     0xF0, 0x80, 0xF0, 0x80, 0x80
 ]
 
+SNAPSHOT_MAGIC = b'C8S'
+SNAPSHOT_VERSION = 3
+# magic, version, PC, I, SP, DT, ST, cycles, timer tick, key bits,
+# registers, stack; memory follows the header. The timer tick is signed,
+# a speed change early in a timer period moves it before cycle 0
+SNAPSHOT_HEADER = struct.Struct('<3sBHHBBBQqH16s20H')
+SNAPSHOT_SIZE = SNAPSHOT_HEADER.size + 0x1000
+KEY_BITS = [1 << key for key in range(16)]
+STACK_DEPTH = 20
+ZERO_MEMORY = memoryview(bytes(0x1000))
+ZERO_STACK = array('H', bytes(2 * STACK_DEPTH))
+ALL_ROWS = 0xffffffff
+
 
 class Chip8State:
+    __slots__ = ('memory', 'PC', 'SP', 'DT', 'ST', 'stack', 'registers', 'I',
+                 'screen_buffer_length', 'screen_buffer_start', 'screen',
+                 'keys', 'cycles', 'timer_tick', 'code_version',
+                 'screen_version', 'dirty_rows')
+
     def __init__(self):
         self.memory = bytearray(0x1000)
         self.PC = 0x200
         self.SP = 0x00
         self.DT = 0x00
         self.ST = 0x00
-        self.stack = [0 for _ in range(20)]
+        self.stack = array('H', ZERO_STACK)
         self.registers = bytearray(0x10)
         self.I = 0
         self.screen_buffer_length = 0x100
         self.screen_buffer_start = 0x1000 - self.screen_buffer_length
-        self.keys = [False] * 16
-        self.timer_counter = 9
+        self.screen = memoryview(self.memory)[self.screen_buffer_start:]
+        self.keys = bytearray(16)
+        self.cycles = 0
+        # time of the last timer tick in cycles times the timer rate, so
+        # timer periods that are not a whole number of cycles stay exact
+        self.timer_tick = 0
+        self.code_version = 0
+        # bumped on every change of the screen, with a bit set for every
+        # row changed since the renderer last cleared dirty_rows
+        self.screen_version = 0
+        self.dirty_rows = ALL_ROWS
         self.load_font(CHIP8_STANDARD_FONT)
 
     def load_program(self, program):
         rest = len(self.memory) - len(program) - 0x200
         self.memory[0x200: 0x200 + len(program)] = program
-        self.memory[0x200 + len(program):] = [0x00] * rest
+        self.memory[0x200 + len(program):] = ZERO_MEMORY[:rest]
+        self.code_version += 1
+        self.mark_screen()
 
     def load_font(self, font):
         self.memory[:0x50] = font
+        self.code_version += 1
 
     def reset(self):
-        self.registers[:] = [0] * len(self.registers)
-        self.memory[:] = [0] * (len(self.memory))
+        self.registers[:] = ZERO_MEMORY[:len(self.registers)]
+        self.memory[:] = ZERO_MEMORY[:len(self.memory)]
         self.DT = 0
         self.ST = 0
         self.I = 0
         self.PC = 0x200
         self.SP = 0
-        self.stack[:] = [0] * len(self.stack)
+        self.cycles = 0
+        self.timer_tick = 0
+        self.stack[:] = ZERO_STACK
         self.load_font(CHIP8_STANDARD_FONT)
+        self.mark_screen()
+
+    def mark_screen(self, rows=ALL_ROWS):
+        self.dirty_rows |= rows
+        self.screen_version += 1
+
+    def snapshot(self):
+        keys = 0
+        for key, pressed in enumerate(self.keys):
+            if pressed:
+                keys |= KEY_BITS[key]
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.PC, self.I, self.SP,
+            self.DT, self.ST, self.cycles, self.timer_tick, keys,
+            bytes(self.registers), *self.stack)
+        return header + self.memory
+
+    def restore(self, snapshot):
+        if len(snapshot) != SNAPSHOT_SIZE:
+            raise InvalidSnapshotError(
+                'Snapshot has {} bytes, expected {}'.format(
+                    len(snapshot), SNAPSHOT_SIZE))
+        values = SNAPSHOT_HEADER.unpack_from(snapshot)
+        if values[0] != SNAPSHOT_MAGIC or values[1] != SNAPSHOT_VERSION:
+            raise InvalidSnapshotError(
+                'Unsupported snapshot format {!r} version {}'.format(
+                    values[0], values[1]))
+        (_, _, self.PC, self.I, self.SP, self.DT, self.ST, self.cycles,
+         self.timer_tick, keys, registers) = values[:11]
+        self.registers[:] = registers
+        self.stack[:] = array('H', values[11:])
+        self.keys[:] = [keys & bit != 0 for bit in KEY_BITS]
+        self.memory[:] = memoryview(snapshot)[SNAPSHOT_HEADER.size:]
+        self.code_version += 1
+        self.mark_screen()
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.snapshot())
+
+    def load(self, path):
+        with open(path, 'rb') as file:
+            self.restore(file.read())
+
+
+class InvalidSnapshotError(Exception):
+    def __init__(self, message):
+        super(InvalidSnapshotError, self).__init__(message)
+        self.message = message
+
+
+def screen_hash(state):
+    return hashlib.sha1(state.screen).hexdigest()
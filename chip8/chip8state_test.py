@@ -1,5 +1,8 @@
+import os
+from array import array
+import tempfile
 import unittest
-from chip8.chip8state import Chip8State
+from chip8.chip8state import Chip8State, InvalidSnapshotError, screen_hash
 
 
 STANDARD_FONT = [
@@ -67,6 +70,132 @@ class StateTest(unittest.TestCase):
         self.assertZeros(state.stack)
         self.assertArray(state.memory, STANDARD_FONT)
 
+    def test_restore_brings_back_snapshot(self):
+        state = self.busy_state()
+        snapshot = state.snapshot()
+        restored = Chip8State()
+        restored.restore(snapshot)
+        self.assertSameState(state, restored)
+
+    def test_restore_keeps_containers(self):
+        state = Chip8State()
+        memory, keys, stack = state.memory, state.keys, state.stack
+        state.restore(self.busy_state().snapshot())
+        self.assertIs(memory, state.memory)
+        self.assertIs(keys, state.keys)
+        self.assertIs(stack, state.stack)
+
+    def test_snapshot_is_not_changed_by_later_execution(self):
+        state = self.busy_state()
+        snapshot = state.snapshot()
+        state.memory[0x300] = 0x99
+        state.PC = 0x400
+        state.restore(snapshot)
+        self.assertEqual(0x12, state.memory[0x300])
+        self.assertEqual(0x234, state.PC)
+
+    def test_restore_changes_code_version(self):
+        state = Chip8State()
+        version = state.code_version
+        state.restore(state.snapshot())
+        self.assertNotEqual(version, state.code_version)
+
+    def test_restore_rejects_wrong_length(self):
+        state = Chip8State()
+        with self.assertRaises(InvalidSnapshotError):
+            state.restore(state.snapshot()[:-1])
+
+    def test_restore_rejects_other_format(self):
+        state = Chip8State()
+        snapshot = bytearray(state.snapshot())
+        snapshot[3] = 99
+        with self.assertRaises(InvalidSnapshotError):
+            state.restore(snapshot)
+
+    def test_save_and_load_through_file(self):
+        state = self.busy_state()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'game.state')
+            state.save(path)
+            loaded = Chip8State()
+            loaded.load(path)
+        self.assertSameState(state, loaded)
+
+    def test_state_has_no_instance_dictionary(self):
+        self.assertFalse(hasattr(Chip8State(), '__dict__'))
+
+    def test_screen_is_view_of_screen_memory(self):
+        state = Chip8State()
+        state.memory[0xf00] = 0x81
+        state.memory[0xfff] = 0x18
+        self.assertEqual(0x100, len(state.screen))
+        self.assertEqual(0x81, state.screen[0])
+        self.assertEqual(0x18, state.screen[0xff])
+
+    def test_new_screen_needs_presenting(self):
+        self.assertEqual(0xffffffff, Chip8State().dirty_rows)
+
+    def test_screen_hash_depends_only_on_screen(self):
+        state = Chip8State()
+        empty = screen_hash(state)
+        state.registers[0] = 1
+        self.assertEqual(empty, screen_hash(state))
+        state.screen[0] = 0x80
+        self.assertNotEqual(empty, screen_hash(state))
+
+    def test_mark_screen_adds_rows_and_bumps_version(self):
+        state = Chip8State()
+        state.dirty_rows = 0b0001
+        version = state.screen_version
+        state.mark_screen(0b1000)
+        self.assertEqual(0b1001, state.dirty_rows)
+        self.assertEqual(version + 1, state.screen_version)
+
+    def test_whole_screen_changed_by_reset_load_and_restore(self):
+        state = Chip8State()
+        snapshot = state.snapshot()
+        for change in (state.reset, lambda: state.load_program([0x12]),
+                       lambda: state.restore(snapshot)):
+            state.dirty_rows = 0
+            change()
+            self.assertEqual(0xffffffff, state.dirty_rows)
+
+    def test_reset_keeps_containers(self):
+        state = Chip8State()
+        memory, stack, registers = state.memory, state.stack, state.registers
+        state.load_program([0x12, 0x00])
+        state.reset()
+        self.assertIs(memory, state.memory)
+        self.assertIs(stack, state.stack)
+        self.assertIs(registers, state.registers)
+        state.memory[0xf00] = 0x42
+        self.assertEqual(0x42, state.screen[0])
+
+    def busy_state(self):
+        state = Chip8State()
+        state.load_program([0x12, 0x00])
+        state.memory[0x300] = 0x12
+        state.memory[0xfff] = 0x80
+        state.PC = 0x234
+        state.I = 0xabc
+        state.SP = 3
+        state.DT = 40
+        state.ST = 7
+        state.cycles = 12345
+        state.timer_tick = 740000
+        state.registers[:] = range(0x10, 0x20)
+        state.stack[:3] = array('H', [0x202, 0x30e, 0xffe])
+        state.keys[0x0] = state.keys[0xa] = state.keys[0xf] = True
+        return state
+
+    def assertSameState(self, expected, actual):
+        for name in ('PC', 'I', 'SP', 'DT', 'ST', 'cycles', 'timer_tick'):
+            self.assertEqual(getattr(expected, name), getattr(actual, name))
+        self.assertEqual(expected.memory, actual.memory)
+        self.assertEqual(expected.registers, actual.registers)
+        self.assertEqual(expected.stack, actual.stack)
+        self.assertEqual(expected.keys, actual.keys)
+
     def assertZeros(self, array):
         for value in array:
             self.assertEqual(0, value)
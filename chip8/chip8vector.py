@@ -0,0 +1,317 @@
+from array import array
+
+import numpy as np
+
+from chip8.chip8cpu import CLOCK_SPEED, TIMER_RATE
+from chip8.chip8state import CHIP8_STANDARD_FONT, Chip8State
+
+
+class Chip8VectorState:
+    def __init__(self, count):
+        self.count = count
+        self.memory = np.zeros((count, 0x1000), np.uint8)
+        self.registers = np.zeros((count, 0x10), np.uint8)
+        self.stack = np.zeros((count, 20), np.int64)
+        self.PC = np.full(count, 0x200, np.int64)
+        self.SP = np.zeros(count, np.int64)
+        self.I = np.zeros(count, np.int64)
+        self.DT = np.zeros(count, np.int64)
+        self.ST = np.zeros(count, np.int64)
+        self.cycles = np.zeros(count, np.int64)
+        self.timer_tick = np.zeros(count, np.int64)
+        self.keys = np.zeros((count, 0x10), np.bool_)
+        self.screen_buffer_length = 0x100
+        self.screen_buffer_start = 0x1000 - self.screen_buffer_length
+        self.load_font(CHIP8_STANDARD_FONT)
+
+    def load_program(self, program, machines=slice(None)):
+        self.memory[machines, 0x200:] = 0
+        self.memory[machines, 0x200: 0x200 + len(program)] = \
+            np.frombuffer(bytes(program), np.uint8)
+
+    def load_font(self, font, machines=slice(None)):
+        self.memory[machines, :0x50] = font
+
+    def get_state(self, machine):
+        state = Chip8State()
+        state.memory[:] = self.memory[machine].tobytes()
+        state.registers[:] = self.registers[machine].tobytes()
+        state.stack[:] = array('H', self.stack[machine].tolist())
+        state.keys[:] = self.keys[machine].tobytes()
+        for name in ('PC', 'SP', 'I', 'DT', 'ST', 'cycles', 'timer_tick'):
+            setattr(state, name, int(getattr(self, name)[machine]))
+        return state
+
+    def set_state(self, machine, state):
+        self.memory[machine] = np.frombuffer(bytes(state.memory), np.uint8)
+        self.registers[machine] = np.frombuffer(bytes(state.registers),
+                                                np.uint8)
+        self.stack[machine] = state.stack
+        self.keys[machine] = state.keys
+        for name in ('PC', 'SP', 'I', 'DT', 'ST', 'cycles', 'timer_tick'):
+            getattr(self, name)[machine] = getattr(state, name)
+
+
+class Chip8VectorCpu:
+    def __init__(self, state, rng):
+        self.state = state
+        self.rng = rng
+        self.schip = False
+        self.clock_speed = CLOCK_SPEED
+        self.timer_rate = TIMER_RATE
+        self.machines = np.arange(state.count)
+
+    def run(self, cycles):
+        for _ in range(cycles):
+            self.tick()
+
+    def tick(self):
+        state = self.state
+        machines = self.machines
+        pc = state.PC
+        instruction = (state.memory[machines, pc].astype(np.int64) << 8) | \
+            state.memory[machines, pc + 1]
+        self.next_pc = pc + 2
+        self.halted = np.zeros(state.count, np.bool_)
+        group = instruction >> 0x0c
+        for number in np.unique(group):
+            selected = np.flatnonzero(group == number)
+            operation = self.groups[number]
+            operation(self, selected, instruction[selected])
+        state.PC = np.where(self.halted, pc, self.next_pc)
+        state.cycles += 1
+        self.update_timers()
+
+    def update_timers(self):
+        state = self.state
+        elapsed = state.cycles * self.timer_rate - state.timer_tick
+        ticks = np.maximum(elapsed, 0) // self.clock_speed
+        state.timer_tick += ticks * self.clock_speed
+        state.DT = np.maximum(state.DT - ticks, 0)
+        state.ST = np.maximum(state.ST - ticks, 0)
+
+    def skip(self, selected, condition):
+        self.next_pc[selected[condition]] += 2
+
+    def system(self, selected, instruction):
+        state = self.state
+        clear = selected[instruction == 0x00e0]
+        state.memory[clear, -0x100:] = 0
+        returning = selected[instruction == 0x00ee]
+        state.SP[returning] -= 1
+        sp = state.SP[returning]
+        self.next_pc[returning] = state.stack[returning, sp] + 2
+
+    def jump(self, selected, instruction):
+        self.next_pc[selected] = instruction & 0x0fff
+
+    def call(self, selected, instruction):
+        state = self.state
+        state.stack[selected, state.SP[selected]] = state.PC[selected]
+        state.SP[selected] += 1
+        self.next_pc[selected] = instruction & 0x0fff
+
+    def skip_if_register_equals(self, selected, instruction):
+        values = self.state.registers[selected, (instruction >> 8) & 0xf]
+        self.skip(selected, values == instruction & 0xff)
+
+    def skip_if_register_differs(self, selected, instruction):
+        values = self.state.registers[selected, (instruction >> 8) & 0xf]
+        self.skip(selected, values != instruction & 0xff)
+
+    def skip_if_registers_equal(self, selected, instruction):
+        value1, value2 = self.register_pair(selected, instruction)
+        self.skip(selected, (value1 == value2) & (instruction & 0xf == 0))
+
+    def skip_if_registers_differ(self, selected, instruction):
+        value1, value2 = self.register_pair(selected, instruction)
+        self.skip(selected, (value1 != value2) & (instruction & 0xf == 0))
+
+    def register_pair(self, selected, instruction):
+        registers = self.state.registers
+        value1 = registers[selected, (instruction >> 8) & 0xf]
+        value2 = registers[selected, (instruction >> 4) & 0xf]
+        return value1.astype(np.int64), value2.astype(np.int64)
+
+    def load_value(self, selected, instruction):
+        registers = self.state.registers
+        registers[selected, (instruction >> 8) & 0xf] = instruction & 0xff
+
+    def add_value(self, selected, instruction):
+        registers = self.state.registers
+        register = (instruction >> 8) & 0xf
+        sum = registers[selected, register] + (instruction & 0xff)
+        registers[selected, register] = sum & 0xff
+
+    def alu(self, selected, instruction):
+        registers = self.state.registers
+        mode = instruction & 0xf
+        register1 = (instruction >> 8) & 0xf
+        value1, value2 = self.register_pair(selected, instruction)
+        shifted = value1 if self.schip else value2
+        results = {
+            0x0: value2,
+            0x1: value1 | value2,
+            0x2: value1 & value2,
+            0x3: value1 ^ value2,
+            0x4: (value1 + value2) & 0xff,
+            0x5: value1 - value2,
+            0x6: shifted >> 1,
+            0x7: value2 - value1,
+            0xe: (shifted << 1) & 0xff,
+        }
+        flags = {
+            0x4: results[0x4] < value1,
+            0x5: results[0x5] >= 0,
+            0x7: results[0x7] >= 0,
+        }
+        for number in np.unique(mode):
+            if number not in results:
+                continue
+            chosen = mode == number
+            machines = selected[chosen]
+            targets = register1[chosen]
+            result = results[number][chosen] & 0xff
+            if number in flags:
+                registers[machines, 0xf] = flags[number][chosen]
+            registers[machines, targets] = result
+            if number == 0x6:
+                registers[machines, 0xf] = shifted[chosen] & 0x01
+            elif number == 0xe:
+                registers[machines, 0xf] = shifted[chosen] >> 7
+
+    def load_index(self, selected, instruction):
+        self.state.I[selected] = instruction & 0x0fff
+
+    def jump_with_offset(self, selected, instruction):
+        offset = self.state.registers[selected, 0x0]
+        self.next_pc[selected] = (instruction & 0x0fff) + offset
+
+    def load_random(self, selected, instruction):
+        registers = self.state.registers
+        random = np.asarray(self.rng(len(selected)), np.int64)
+        registers[selected, (instruction >> 8) & 0xf] = \
+            random & instruction & 0xff
+
+    def draw(self, selected, instruction):
+        state = self.state
+        memory = state.memory
+        x, y = self.register_pair(selected, instruction)
+        x &= 0x3f
+        y &= 0x1f
+        height = np.minimum(instruction & 0xf, 0x20 - y)
+        shift = x & 0x07
+        start = state.screen_buffer_start + (x >> 3) + (y << 3)
+        address = state.I[selected]
+        state.registers[selected, 0xf] = 0
+        collision = np.zeros(len(selected), np.bool_)
+        for row in range(int(height.max(initial=0))):
+            drawn = row < height
+            sprite = memory[selected, address + row * drawn].astype(np.int64)
+            sprite *= drawn
+            left = start + (row << 3) * drawn
+            right = np.minimum(left + 1, 0xfff)
+            byte1 = sprite >> shift
+            byte2 = ((sprite << (8 - shift)) & 0xff) * (x < 0x38)
+            for position, byte in ((left, byte1), (right, byte2)):
+                old = memory[selected, position]
+                memory[selected, position] = old ^ byte
+                collision |= (old & byte) != 0
+        state.registers[selected[collision], 0xf] = 1
+
+    def handle_keyboard(self, selected, instruction):
+        state = self.state
+        mode = instruction & 0xff
+        key = state.registers[selected, (instruction >> 8) & 0xf]
+        pressed = state.keys[selected, key & 0xf] & (key <= 0xf)
+        skipped = ((mode == 0x9e) & pressed) | ((mode == 0xa1) & ~pressed)
+        self.skip(selected, skipped)
+
+    def handle_memory_operation(self, selected, instruction):
+        mode = instruction & 0xff
+        for number in np.unique(mode):
+            operation = self.memory_operations.get(number)
+            if operation is not None:
+                chosen = mode == number
+                operation(self, selected[chosen],
+                          (instruction[chosen] >> 8) & 0xf)
+
+    def load_delay_timer(self, selected, register):
+        self.state.registers[selected, register] = self.state.DT[selected]
+
+    def halt_until_key_pressed(self, selected, register):
+        keys = self.state.keys[selected]
+        pressed = keys.any(axis=1)
+        self.halted[selected[~pressed]] = True
+        self.state.registers[selected[pressed], register[pressed]] = \
+            keys[pressed].argmax(axis=1)
+
+    def set_delay_timer(self, selected, register):
+        self.state.DT[selected] = self.state.registers[selected, register]
+
+    def set_sound_timer(self, selected, register):
+        self.state.ST[selected] = self.state.registers[selected, register]
+
+    def add_to_index(self, selected, register):
+        self.state.I[selected] += self.state.registers[selected, register]
+
+    def load_font_sprite(self, selected, register):
+        values = self.state.registers[selected, register].astype(np.int64)
+        self.state.I[selected] = values * 5
+
+    def store_bcd(self, selected, register):
+        state = self.state
+        value = state.registers[selected, register]
+        address = state.I[selected]
+        state.memory[selected, address] = value // 100
+        state.memory[selected, address + 1] = value // 10 % 10
+        state.memory[selected, address + 2] = value % 10
+
+    def store_registers(self, selected, register):
+        state = self.state
+        address = state.I[selected]
+        for offset in range(0x10):
+            stored = offset <= register
+            state.memory[selected[stored], address[stored] + offset] = \
+                state.registers[selected[stored], offset]
+        state.I[selected] += register + 1
+
+    def load_registers(self, selected, register):
+        state = self.state
+        address = state.I[selected]
+        for offset in range(0x10):
+            loaded = offset <= register
+            state.registers[selected[loaded], offset] = \
+                state.memory[selected[loaded], address[loaded] + offset]
+        state.I[selected] += register + 1
+
+    groups = {
+        0x0: system,
+        0x1: jump,
+        0x2: call,
+        0x3: skip_if_register_equals,
+        0x4: skip_if_register_differs,
+        0x5: skip_if_registers_equal,
+        0x6: load_value,
+        0x7: add_value,
+        0x8: alu,
+        0x9: skip_if_registers_differ,
+        0xa: load_index,
+        0xb: jump_with_offset,
+        0xc: load_random,
+        0xd: draw,
+        0xe: handle_keyboard,
+        0xf: handle_memory_operation,
+    }
+
+    memory_operations = {
+        0x07: load_delay_timer,
+        0x0a: halt_until_key_pressed,
+        0x15: set_delay_timer,
+        0x18: set_sound_timer,
+        0x1e: add_to_index,
+        0x29: load_font_sprite,
+        0x33: store_bcd,
+        0x55: store_registers,
+        0x65: load_registers,
+    }
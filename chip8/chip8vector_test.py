@@ -0,0 +1,135 @@
+import random
+import unittest
+
+import numpy as np
+
+from chip8.chip8cpu import Chip8Cpu
+from chip8.chip8gpu import Chip8Gpu
+from chip8.chip8state import Chip8State
+from chip8.chip8vector import Chip8VectorCpu, Chip8VectorState
+
+RANDOM_NUMBER = 0x5a
+TEMPLATES = [
+    0x00e0, 0x3000, 0x4000, 0x5000, 0x5001, 0x6000, 0x7000,
+    0x8000, 0x8001, 0x8002, 0x8003, 0x8004, 0x8005, 0x8006, 0x8007,
+    0x8008, 0x800e, 0x9000, 0x9001, 0xc000, 0xd000, 0xe09e, 0xe0a1,
+    0xe0ff, 0xf007, 0xf00a, 0xf015, 0xf018, 0xf029, 0xf033, 0xf055,
+    0xf065, 0xf0ff,
+]
+
+
+def random_program(generator, length):
+    instructions = []
+    for _ in range(length):
+        kind = generator.randrange(len(TEMPLATES) + 2)
+        if kind == len(TEMPLATES):
+            instructions.append(0xa300 | generator.randrange(0x100))
+        elif kind == len(TEMPLATES) + 1:
+            target = 0x200 + 2 * generator.randrange(length)
+            instructions.append(0x1000 | target)
+        else:
+            operands = generator.randrange(0x1000)
+            instructions.append(TEMPLATES[kind] | operands
+                                if TEMPLATES[kind] & 0x0fff == 0
+                                else TEMPLATES[kind] | operands & 0x0f00)
+    instructions += [0x1200, 0x1200]
+    program = []
+    for instruction in instructions:
+        program += [instruction >> 8, instruction & 0xff]
+    return program
+
+
+class VectorCpuTest(unittest.TestCase):
+    def setUp(self):
+        self.generator = random.Random(1234)
+
+    def test_random_programs_match_interpreter(self):
+        self.assert_random_programs_match(schip=False)
+
+    def test_random_programs_match_interpreter_in_schip_mode(self):
+        self.assert_random_programs_match(schip=True)
+
+    def test_call_and_return_match_interpreter(self):
+        program = [0x22, 0x06, 0x70, 0x01, 0x12, 0x00,
+                   0x71, 0x01, 0x00, 0xee]
+        self.assert_programs_match([program] * 2, 50, schip=False)
+
+    def test_add_to_index_and_jump_with_offset_match_interpreter(self):
+        program = [0x60, 0x02, 0xF0, 0x1E, 0xB2, 0x00]
+        self.assert_programs_match([program], 30, schip=False)
+
+    def test_halted_machine_waits_for_own_key(self):
+        state = Chip8VectorState(2)
+        state.load_program([0xF3, 0x0A, 0x12, 0x02])
+        state.keys[1, 0x6] = True
+        cpu = Chip8VectorCpu(state, self.random_numbers)
+        cpu.run(3)
+        self.assertEqual([0x200, 0x202], state.PC.tolist())
+        self.assertEqual(0x6, state.registers[1, 0x3])
+        self.assertEqual([3, 3], state.cycles.tolist())
+
+    def assert_random_programs_match(self, schip):
+        programs = [random_program(self.generator, 48) for _ in range(48)]
+        self.assert_programs_match(programs, 200, schip)
+
+    def assert_programs_match(self, programs, cycles, schip):
+        vector_state = Chip8VectorState(len(programs))
+        states = []
+        for machine, program in enumerate(programs):
+            state = Chip8State()
+            state.load_program(program)
+            state.registers[:] = bytes(self.generator.randrange(0x100)
+                                       for _ in range(0x10))
+            state.keys[:] = [self.generator.random() < 0.3
+                             for _ in range(0x10)]
+            state.DT = self.generator.randrange(0x10)
+            vector_state.set_state(machine, state)
+            states.append(state)
+        vector_cpu = Chip8VectorCpu(vector_state, self.random_numbers)
+        vector_cpu.schip = schip
+        vector_cpu.run(cycles)
+        for machine, state in enumerate(states):
+            cpu = Chip8Cpu(state, lambda: RANDOM_NUMBER, Chip8Gpu(state))
+            cpu.schip = schip
+            for _ in range(cycles):
+                cpu.tick()
+            self.assert_same_state(state, vector_state.get_state(machine))
+
+    def random_numbers(self, count):
+        return np.full(count, RANDOM_NUMBER)
+
+    def assert_same_state(self, expected, actual):
+        self.assertEqual(expected.memory, actual.memory)
+        self.assertEqual(expected.registers, actual.registers)
+        self.assertEqual(expected.stack, actual.stack)
+        for name in ('PC', 'I', 'SP', 'DT', 'ST', 'cycles', 'timer_tick'):
+            self.assertEqual(getattr(expected, name), getattr(actual, name))
+
+
+class VectorStateTest(unittest.TestCase):
+    def test_state_round_trips(self):
+        state = Chip8State()
+        state.load_program([0x12, 0x34, 0x56])
+        state.registers[0x3] = 0x42
+        state.stack[2] = 0x246
+        state.PC = 0x222
+        state.keys[0x5] = True
+        vector_state = Chip8VectorState(3)
+        vector_state.set_state(1, state)
+        copy = vector_state.get_state(1)
+        self.assertEqual(state.memory, copy.memory)
+        self.assertEqual(state.registers, copy.registers)
+        self.assertEqual(state.stack, copy.stack)
+        self.assertEqual(state.keys, copy.keys)
+        self.assertEqual(0x222, copy.PC)
+
+    def test_load_program_loads_every_machine(self):
+        vector_state = Chip8VectorState(2)
+        vector_state.load_program([0x01, 0x02])
+        memory = vector_state.memory
+        self.assertEqual([0x01, 0x02], memory[1, 0x200:0x202].tolist())
+        self.assertEqual(0xF0, vector_state.memory[0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
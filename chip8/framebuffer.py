@@ -0,0 +1,27 @@
+from chip8.chip8state import ALL_ROWS
+
+
+class Chip8FrameBuffer:
+    def __init__(self, size=0x100):
+        self.buffers = [bytearray(size), bytearray(size)]
+        self.front = 0
+        self.screen_buffer_start = 0
+        self.dirty_rows = ALL_ROWS
+        self.version = 0
+
+    @property
+    def memory(self):
+        return self.buffers[self.front]
+
+    def publish(self, state):
+        back = self.front ^ 1
+        self.buffers[back][:] = state.screen
+        self.dirty_rows |= state.dirty_rows
+        state.dirty_rows = 0
+        self.front = back
+        self.version += 1
+
+    def take_dirty_rows(self):
+        rows = self.dirty_rows
+        self.dirty_rows = 0
+        return rows
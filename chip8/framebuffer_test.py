@@ -0,0 +1,42 @@
+import unittest
+
+from chip8.chip8state import Chip8State
+from chip8.framebuffer import Chip8FrameBuffer
+
+
+class Chip8FrameBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.state = Chip8State()
+        self.frames = Chip8FrameBuffer()
+
+    def test_first_frame_is_all_dirty(self):
+        self.assertEqual(0xffffffff, self.frames.take_dirty_rows())
+        self.assertEqual(0, self.frames.take_dirty_rows())
+
+    def test_publish_swaps_in_copy_of_screen(self):
+        previous = self.frames.memory
+        self.state.screen[0x10] = 0x81
+        self.frames.publish(self.state)
+        self.state.screen[0x10] = 0x00
+        self.assertIsNot(previous, self.frames.memory)
+        self.assertEqual(0x81, self.frames.memory[0x10])
+
+    def test_publish_alternates_two_buffers(self):
+        first = self.frames.memory
+        self.frames.publish(self.state)
+        self.frames.publish(self.state)
+        self.assertIs(first, self.frames.memory)
+        self.assertEqual(2, self.frames.version)
+
+    def test_dirty_rows_collected_until_taken(self):
+        self.frames.take_dirty_rows()
+        self.state.dirty_rows = 0b01
+        self.frames.publish(self.state)
+        self.state.dirty_rows = 0b100
+        self.frames.publish(self.state)
+        self.assertEqual(0, self.state.dirty_rows)
+        self.assertEqual(0b101, self.frames.take_dirty_rows())
+
+
+if __name__ == '__main__':
+    unittest.main()
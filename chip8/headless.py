@@ -0,0 +1,207 @@
+import argparse
+import json
+import random
+import time
+from sys import argv
+
+from chip8.analysis import get_cache_directory, load_analysis
+from chip8.aot import load_module
+from chip8.chip8blockcpu import Chip8BlockCpu
+from chip8.chip8cpu import Chip8Cpu
+from chip8.chip8gpu import Chip8Gpu
+from chip8.chip8state import Chip8State, screen_hash
+from chip8.profiler import Chip8Profiler
+from chip8.recording import Player, load_recording, parse_script
+
+CYCLES_PER_FRAME = 9
+FRAME_RATE = 60
+DEFAULT_FRAMES = 600
+ENGINES = {'interpreter': Chip8Cpu, 'block': Chip8BlockCpu,
+           'aot': Chip8BlockCpu}
+
+
+class RunResult:
+    def __init__(self):
+        self.frames = 0
+        self.cycles = 0
+        self.elapsed = 0.0
+        self.screen_hash = None
+        self.frame_hashes = []
+        self.waiting_for_key = False
+
+    def instructions_per_second(self):
+        return self.cycles / self.elapsed if self.elapsed else 0.0
+
+    def frames_per_second(self):
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self):
+        return {
+            'frames': self.frames,
+            'cycles': self.cycles,
+            'elapsed': self.elapsed,
+            'instructions_per_second': self.instructions_per_second(),
+            'frames_per_second': self.frames_per_second(),
+            'screen_hash': self.screen_hash,
+            'frame_hashes': self.frame_hashes,
+            'waiting_for_key': self.waiting_for_key,
+        }
+
+
+def is_waiting_for_key(state):
+    memory = state.memory
+    instruction = (memory[state.PC] << 8) + memory[state.PC + 1]
+    return instruction & 0xf0ff == 0xf00a and not any(state.keys)
+
+
+def create_machine(program, seed=0, schip=False, engine='interpreter'):
+    state = Chip8State()
+    state.load_program(program)
+    rng = random.Random(seed)
+    gpu = Chip8Gpu(state)
+    cpu = ENGINES[engine](state, lambda: rng.randrange(0x00, 0x100), gpu)
+    cpu.schip = schip
+    return state, cpu
+
+
+def run(program, frames=None, cycles=None, seed=0, schip=False, script=(),
+        fps=None, engine='interpreter', cycles_per_frame=CYCLES_PER_FRAME,
+        frame_hashes=False, profiler=None, analysis=None, aot_cache=None):
+    if cycles is None:
+        cycles = (frames or 0) * cycles_per_frame
+    state, cpu = create_machine(program, seed, schip, engine)
+    cpu.clock_speed = cycles_per_frame * FRAME_RATE
+    if analysis is not None:
+        cpu.prepare(analysis)
+    if engine == 'aot':
+        cache = aot_cache or get_cache_directory()
+        cpu.load_module(load_module(program, schip, cache))
+    if profiler is not None:
+        profiler.attach(cpu)
+    result = RunResult()
+    player = Player(list(script), state.keys)
+    frame_time = 1.0 / fps if fps else 0.0
+    start = time.perf_counter()
+    deadline = start
+    hashed_version = None
+    while result.cycles < cycles:
+        player.play_frame()
+        batch = min(cycles_per_frame, cycles - result.cycles)
+        cpu.run(batch)
+        result.cycles += batch
+        result.frames += 1
+        if frame_hashes:
+            if state.screen_version != hashed_version:
+                hashed_version = state.screen_version
+                frame_hash = screen_hash(state)
+            result.frame_hashes.append(frame_hash)
+        if frame_time:
+            deadline += frame_time
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    result.elapsed = time.perf_counter() - start
+    result.screen_hash = screen_hash(state)
+    result.waiting_for_key = is_waiting_for_key(state)
+    return result
+
+
+def get_arguments(args):
+    parser = argparse.ArgumentParser(
+        prog='python -m chip8.headless',
+        description='Run a Chip8 program without a display.')
+    parser.add_argument('program')
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument('--frames', type=int)
+    limit.add_argument('--cycles', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--schip', action='store_true')
+    parser.add_argument('--input', help='file with "frame key down|up" lines')
+    parser.add_argument('--replay',
+                        help='recording to replay; sets seed, schip, input '
+                             'and, unless given, frames')
+    parser.add_argument('--fps', type=float,
+                        help='throttle to this many frames per second')
+    parser.add_argument('--engine', choices=sorted(ENGINES),
+                        default='interpreter')
+    parser.add_argument('--cycles-per-frame', type=int,
+                        help='instructions per frame, {} or the one of the '
+                             'replayed recording by default'
+                        .format(CYCLES_PER_FRAME))
+    parser.add_argument('--frame-hashes', action='store_true')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--aot-cache',
+                        help='directory for modules compiled by the aot '
+                             'engine, ~/.cache/chip8 by default')
+    parser.add_argument('--analysis-cache',
+                        help='prepare the CPU from a ROM analysis cached in '
+                             'this directory')
+    parser.add_argument('--profile',
+                        help='write opcode profile: .json, .folded or text')
+    return parser.parse_args(args)
+
+
+def to_text(result):
+    lines = [
+        'frames: {}'.format(result.frames),
+        'cycles: {}'.format(result.cycles),
+        'elapsed: {:.6f} s'.format(result.elapsed),
+        'instructions/s: {:.0f}'.format(result.instructions_per_second()),
+        'frames/s: {:.1f}'.format(result.frames_per_second()),
+        'waiting for key: {}'.format(result.waiting_for_key),
+        'screen hash: {}'.format(result.screen_hash),
+    ]
+    for frame, hash in enumerate(result.frame_hashes):
+        lines.append('frame {}: {}'.format(frame, hash))
+    return '\n'.join(lines)
+
+
+def main(args):
+    arguments = get_arguments(args)
+    profiler = Chip8Profiler() if arguments.profile else None
+    with open(arguments.program, 'rb') as file:
+        program = file.read()
+    script = []
+    if arguments.input:
+        with open(arguments.input, 'r') as file:
+            script = parse_script(file.readlines())
+    seed, schip, frames = arguments.seed, arguments.schip, arguments.frames
+    cycles_per_frame = arguments.cycles_per_frame
+    if arguments.replay:
+        recording = load_recording(arguments.replay)
+        seed, schip, script = recording.seed, recording.schip, \
+            recording.events
+        if frames is None and arguments.cycles is None:
+            frames = recording.frames
+        if cycles_per_frame is None:
+            cycles_per_frame = recording.cycles_per_frame
+    if cycles_per_frame is None:
+        cycles_per_frame = CYCLES_PER_FRAME
+    if frames is None:
+        frames = DEFAULT_FRAMES
+    analysis = None
+    if arguments.analysis_cache:
+        analysis = load_analysis(program, arguments.analysis_cache)
+    result = run(program,
+                 frames=frames,
+                 cycles=arguments.cycles,
+                 seed=seed,
+                 schip=schip,
+                 script=script,
+                 fps=arguments.fps,
+                 engine=arguments.engine,
+                 cycles_per_frame=cycles_per_frame,
+                 frame_hashes=arguments.frame_hashes,
+                 profiler=profiler,
+                 analysis=analysis,
+                 aot_cache=arguments.aot_cache)
+    if profiler is not None:
+        profiler.save(arguments.profile)
+    if arguments.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        print(to_text(result))
+
+
+if __name__ == '__main__':
+    main(argv[1:])
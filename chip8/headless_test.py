@@ -0,0 +1,81 @@
+import unittest
+
+from chip8.headless import run
+
+EMPTY_SCREEN_HASH = 'b376885ac8452b6cbf9ced81b1080bfd570d9b91'
+
+DRAW_KEY_PROGRAM = [
+    0xF0, 0x0A,  # V0 = key
+    0xF0, 0x29,  # I = font sprite of V0
+    0xD1, 0x15,  # draw at V1, V1
+    0x12, 0x06,  # spin
+]
+
+RANDOM_PROGRAM = [
+    0xC0, 0xff,  # V0 = rnd
+    0xA2, 0x00,  # I = 0x200
+    0xD0, 0x05,  # draw at V0, V0
+    0x12, 0x06,  # spin
+]
+
+DELAY_PROGRAM = [
+    0x60, 0x1e,  # V0 = 30
+    0xF0, 0x15,  # DT = V0
+    0xF1, 0x07,  # 0x204: V1 = DT
+    0x31, 0x00,  # skip if V1 == 0
+    0x12, 0x04,  # jump 0x204
+    0xD0, 0x05,  # draw at V0, V0
+    0x12, 0x0c,  # spin
+]
+
+
+class RunTest(unittest.TestCase):
+    def test_frames_run_cycles_per_frame(self):
+        result = run(DRAW_KEY_PROGRAM, frames=10, cycles_per_frame=3)
+        self.assertEqual(10, result.frames)
+        self.assertEqual(30, result.cycles)
+
+    def test_cycles_limit_last_frame(self):
+        result = run(DRAW_KEY_PROGRAM, cycles=20)
+        self.assertEqual(3, result.frames)
+        self.assertEqual(20, result.cycles)
+
+    def test_program_waiting_for_key_is_reported(self):
+        result = run(DRAW_KEY_PROGRAM, frames=5)
+        self.assertTrue(result.waiting_for_key)
+        self.assertEqual(EMPTY_SCREEN_HASH, result.screen_hash)
+
+    def test_scripted_key_is_pressed_at_frame(self):
+        script = [(3, 0x8, True)]
+        result = run(DRAW_KEY_PROGRAM, frames=5, script=script,
+                     frame_hashes=True)
+        self.assertFalse(result.waiting_for_key)
+        self.assertEqual([EMPTY_SCREEN_HASH] * 3, result.frame_hashes[:3])
+        self.assertNotEqual(EMPTY_SCREEN_HASH, result.frame_hashes[3])
+
+    def test_delay_timer_runs_at_60_hz_of_frames(self):
+        for cycles_per_frame in (5, 9, 40):
+            result = run(DELAY_PROGRAM, frames=32, frame_hashes=True,
+                         cycles_per_frame=cycles_per_frame)
+            hashes = result.frame_hashes
+            self.assertEqual(EMPTY_SCREEN_HASH, hashes[28])
+            self.assertNotEqual(EMPTY_SCREEN_HASH, hashes[31])
+
+    def test_same_seed_gives_same_screen(self):
+        first = run(RANDOM_PROGRAM, frames=2, seed=42)
+        second = run(RANDOM_PROGRAM, frames=2, seed=42, engine='block')
+        self.assertEqual(first.screen_hash, second.screen_hash)
+
+    def test_different_seeds_give_different_screens(self):
+        first = run(RANDOM_PROGRAM, frames=2, seed=1)
+        second = run(RANDOM_PROGRAM, frames=2, seed=2)
+        self.assertNotEqual(first.screen_hash, second.screen_hash)
+
+    def test_result_is_serializable(self):
+        result = run(DRAW_KEY_PROGRAM, frames=1).to_dict()
+        self.assertEqual(1, result['frames'])
+        self.assertIn('instructions_per_second', result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import json
+import time
+from collections import Counter
+
+from chip8.chip8cpu import Chip8Cpu
+
+GROUP_CLASSES = [
+    '0NNN', '1NNN', '2NNN', '3XNN', '4XNN', '5XY{:X}', '6XNN', '7XNN',
+    '8XY{:X}', '9XY{:X}', 'ANNN', 'BNNN', 'CXNN', 'DXYN', 'EX{:02X}',
+    'FX{:02X}',
+]
+
+
+def opcode_class(instruction):
+    if instruction in (0x00e0, 0x00ee):
+        return '{:04X}'.format(instruction)
+    group = instruction >> 0x0c
+    pattern = GROUP_CLASSES[group]
+    if group in (0xe, 0xf):
+        return pattern.format(instruction & 0xff)
+    return pattern.format(instruction & 0xf)
+
+
+class Chip8Profiler:
+    def __init__(self):
+        self.classes = {}
+        self.opcodes = Counter()
+        self.addresses = Counter()
+        self.stacks = Counter()
+        self.frames = ['main']
+        self.timings = {}
+        self.cpu = None
+
+    def attach(self, cpu):
+        self.cpu = cpu
+        # the interpreter step, also for engines whose tick runs blocks
+        original_tick = Chip8Cpu.tick.__get__(cpu)
+        original_draw = cpu.gpu.draw
+        cpu.tick = lambda: self.tick(original_tick)
+        cpu.run = self.run
+        cpu.gpu.draw = self.timed('draw', original_draw)
+
+    def detach(self):
+        for name in ('tick', 'run'):
+            self.cpu.__dict__.pop(name, None)
+        self.cpu.gpu.__dict__.pop('draw', None)
+        self.cpu = None
+
+    def timed(self, name, function):
+        timing = self.timings.setdefault(name, [0, 0.0])
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timing[0] += 1
+                timing[1] += time.perf_counter() - start
+        return wrapper
+
+    def run(self, cycles):
+        tick = self.cpu.tick
+        start = time.perf_counter()
+        for _ in range(cycles):
+            tick()
+        timing = self.timings.setdefault('cpu', [0, 0.0])
+        timing[0] += cycles
+        timing[1] += time.perf_counter() - start
+        return False
+
+    def tick(self, original_tick):
+        state = self.cpu.state
+        pc = state.PC
+        instruction = (state.memory[pc] << 8) + state.memory[pc + 1]
+        name = self.classes.get(instruction)
+        if name is None:
+            name = self.classes[instruction] = opcode_class(instruction)
+        self.opcodes[name] += 1
+        self.addresses[pc] += 1
+        self.stacks[';'.join(self.frames + [name])] += 1
+        original_tick()
+        if instruction >> 0x0c == 0x2:
+            self.frames.append('sub_{:03x}'.format(instruction & 0x0fff))
+        elif instruction == 0x00ee and len(self.frames) > 1:
+            self.frames.pop()
+
+    def to_dict(self, top=20):
+        timings = {name: {'calls': calls, 'seconds': seconds}
+                   for name, (calls, seconds) in self.timings.items()}
+        return {
+            'instructions': sum(self.opcodes.values()),
+            'opcodes': dict(self.opcodes.most_common()),
+            'hot_addresses': {'0x{:03x}'.format(address): count
+                              for address, count
+                              in self.addresses.most_common(top)},
+            'timings': timings,
+        }
+
+    def to_json(self, top=20):
+        return json.dumps(self.to_dict(top), indent=2)
+
+    def to_text(self, top=20):
+        report = self.to_dict(top)
+        lines = ['instructions: {}'.format(report['instructions']), '',
+                 'opcode     count']
+        for name, count in report['opcodes'].items():
+            lines.append('{:<8} {:>8}'.format(name, count))
+        lines += ['', 'address    count']
+        for address, count in report['hot_addresses'].items():
+            lines.append('{:<8} {:>8}'.format(address, count))
+        lines += ['', 'timing     calls    seconds']
+        for name, timing in sorted(report['timings'].items()):
+            lines.append('{:<8} {:>8} {:>10.6f}'.format(
+                name, timing['calls'], timing['seconds']))
+        return '\n'.join(lines) + '\n'
+
+    def to_folded(self):
+        return ''.join('{} {}\n'.format(stack, count)
+                       for stack, count in sorted(self.stacks.items()))
+
+    def save(self, path):
+        if path.endswith('.json'):
+            content = self.to_json()
+        elif path.endswith('.folded'):
+            content = self.to_folded()
+        else:
+            content = self.to_text()
+        with open(path, 'w') as file:
+            file.write(content)
@@ -0,0 +1,106 @@
+import json
+import unittest
+
+from chip8.chip8blockcpu import Chip8BlockCpu
+from chip8.chip8cpu import Chip8Cpu
+from chip8.chip8gpu import Chip8Gpu
+from chip8.chip8state import Chip8State
+from chip8.profiler import Chip8Profiler, opcode_class
+
+PROGRAM = [
+    0x22, 0x06,  # 0x200: call 0x206
+    0x12, 0x00,  # 0x202: jump 0x200
+    0x00, 0x00,
+    0x60, 0x01,  # 0x206: V0 = 1
+    0xD0, 0x01,  # 0x208: draw
+    0x00, 0xee,  # 0x20a: return
+]
+
+
+class OpcodeClassTest(unittest.TestCase):
+    def test_clear_screen_and_return_are_named_exactly(self):
+        self.assertEqual('00E0', opcode_class(0x00e0))
+        self.assertEqual('00EE', opcode_class(0x00ee))
+
+    def test_alu_class_keeps_mode(self):
+        self.assertEqual('8XY4', opcode_class(0x8ab4))
+
+    def test_memory_class_keeps_low_byte(self):
+        self.assertEqual('FX33', opcode_class(0xf533))
+
+    def test_operands_are_hidden(self):
+        self.assertEqual('DXYN', opcode_class(0xd123))
+
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.state = Chip8State()
+        self.state.load_program(PROGRAM)
+        self.gpu = Chip8Gpu(self.state)
+        self.cpu = Chip8Cpu(self.state, lambda: 0, self.gpu)
+        self.profiler = Chip8Profiler()
+        self.profiler.attach(self.cpu)
+
+    def test_opcodes_are_counted(self):
+        self.cpu.run(10)
+        report = self.profiler.to_dict()
+        self.assertEqual(10, report['instructions'])
+        self.assertEqual(2, report['opcodes']['DXYN'])
+        self.assertEqual(2, report['opcodes']['1NNN'])
+
+    def test_addresses_are_counted(self):
+        self.cpu.run(10)
+        self.assertEqual(2, self.profiler.addresses[0x208])
+
+    def test_draw_is_timed(self):
+        self.cpu.run(10)
+        self.assertEqual(2, self.profiler.timings['draw'][0])
+
+    def test_folded_stacks_follow_calls(self):
+        self.cpu.run(5)
+        lines = self.profiler.to_folded().splitlines()
+        self.assertIn('main;2NNN 1', lines)
+        self.assertIn('main;sub_206;DXYN 1', lines)
+        self.assertIn('main;sub_206;00EE 1', lines)
+        self.assertIn('main;1NNN 1', lines)
+
+    def test_profiled_run_matches_unprofiled_run(self):
+        self.cpu.run(50)
+        state = Chip8State()
+        state.load_program(PROGRAM)
+        Chip8Cpu(state, lambda: 0, Chip8Gpu(state)).run(50)
+        self.assertEqual(state.memory, self.state.memory)
+        self.assertEqual(state.PC, self.state.PC)
+
+    def test_block_engine_is_profiled_per_instruction(self):
+        state = Chip8State()
+        state.load_program(PROGRAM)
+        cpu = Chip8BlockCpu(state, lambda: 0, Chip8Gpu(state))
+        profiler = Chip8Profiler()
+        profiler.attach(cpu)
+        cpu.run(10)
+        self.assertEqual(10, profiler.to_dict()['instructions'])
+        self.assertEqual(2, profiler.opcodes['DXYN'])
+        self.cpu.run(10)
+        self.assertEqual(self.state.PC, state.PC)
+
+    def test_detach_restores_class_methods(self):
+        self.profiler.detach()
+        self.assertNotIn('tick', vars(self.cpu))
+        self.assertNotIn('run', vars(self.cpu))
+        self.assertNotIn('draw', vars(self.gpu))
+
+    def test_timed_function_is_counted(self):
+        timed = self.profiler.timed('blit', lambda value: value + 1)
+        self.assertEqual(3, timed(2))
+        self.assertEqual(1, self.profiler.timings['blit'][0])
+
+    def test_reports_are_exported(self):
+        self.cpu.run(3)
+        self.assertEqual(3, json.loads(self.profiler.to_json())
+                         ['instructions'])
+        self.assertIn('DXYN', self.profiler.to_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+INVALID_SCRIPT_LINE = 'Line {} \'{}\' should be: frame key down|up'
+INVALID_HEADER_LINE = 'Line {} \'{}\' should be: ' \
+    'seed|schip|frames|cycles_per_frame number'
+HEADER = ('seed', 'schip', 'frames', 'cycles_per_frame')
+
+
+class InvalidScriptError(Exception):
+    def __init__(self, message):
+        super(InvalidScriptError, self).__init__(message)
+        self.message = message
+
+
+class Recording:
+    def __init__(self, seed=0, schip=False, frames=0, events=None,
+                 cycles_per_frame=None):
+        self.seed = seed
+        self.schip = schip
+        self.frames = frames
+        self.events = [] if events is None else events
+        self.cycles_per_frame = cycles_per_frame
+
+    def to_text(self):
+        lines = [
+            'seed {}'.format(self.seed),
+            'schip {}'.format(int(self.schip)),
+            'frames {}'.format(self.frames),
+        ]
+        if self.cycles_per_frame is not None:
+            lines.append('cycles_per_frame {}'.format(self.cycles_per_frame))
+        for frame, key, pressed in self.events:
+            state = 'down' if pressed else 'up'
+            lines.append('{} {:x} {}'.format(frame, key, state))
+        return '\n'.join(lines) + '\n'
+
+
+class Recorder:
+    def __init__(self, keys, seed=0, schip=False, cycles_per_frame=None):
+        self.keys = keys
+        self.previous = keys[:]
+        self.recording = Recording(seed, schip,
+                                   cycles_per_frame=cycles_per_frame)
+
+    def record_frame(self):
+        keys = self.keys
+        previous = self.previous
+        if keys != previous:
+            frame = self.recording.frames
+            for key in range(len(keys)):
+                if keys[key] != previous[key]:
+                    self.recording.events.append(
+                        (frame, key, bool(keys[key])))
+            previous[:] = keys
+        self.recording.frames += 1
+
+
+class Player:
+    def __init__(self, events, keys):
+        self.events = events
+        self.keys = keys
+        self.next_event = 0
+        self.frame = 0
+
+    def play_frame(self):
+        events = self.events
+        while self.next_event < len(events) and \
+                events[self.next_event][0] <= self.frame:
+            _, key, pressed = events[self.next_event]
+            self.keys[key] = pressed
+            self.next_event += 1
+        self.frame += 1
+
+
+def parse_script(lines):
+    events = []
+    for line_no, line in enumerate(lines, 1):
+        content = line.split('#')[0].split()
+        if not content:
+            continue
+        if len(content) != 3 or content[2] not in ('down', 'up'):
+            raise InvalidScriptError(
+                INVALID_SCRIPT_LINE.format(line_no, line.strip()))
+        try:
+            frame = int(content[0])
+            key = int(content[1], 16)
+        except ValueError:
+            raise InvalidScriptError(
+                INVALID_SCRIPT_LINE.format(line_no, line.strip()))
+        if key > 0xf:
+            raise InvalidScriptError(
+                INVALID_SCRIPT_LINE.format(line_no, line.strip()))
+        events.append((frame, key, content[2] == 'down'))
+    return sorted(events, key=lambda event: event[0])
+
+
+def parse_recording(lines):
+    recording = Recording()
+    script = []
+    for line_no, line in enumerate(lines, 1):
+        content = line.split('#')[0].split()
+        if not content or content[0] not in HEADER:
+            script.append(line)
+            continue
+        try:
+            value = int(content[1]) if len(content) == 2 else None
+        except ValueError:
+            value = None
+        if value is None:
+            raise InvalidScriptError(
+                INVALID_HEADER_LINE.format(line_no, line.strip()))
+        setattr(recording, content[0], value)
+        script.append('')
+    recording.schip = bool(recording.schip)
+    recording.events = parse_script(script)
+    return recording
+
+
+def save_recording(recording, path):
+    with open(path, 'w') as file:
+        file.write(recording.to_text())
+
+
+def load_recording(path):
+    with open(path, 'r') as file:
+        return parse_recording(file.readlines())
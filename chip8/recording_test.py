@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+from chip8.headless import run
+from chip8.recording import InvalidScriptError, Player, Recorder, \
+    Recording, load_recording, parse_recording, parse_script, \
+    save_recording
+
+WAIT_KEYS_PROGRAM = [
+    0xF0, 0x0A,  # V0 = key
+    0xF0, 0x29,  # I = font sprite of V0
+    0xC1, 0x3f,  # V1 = rnd & 0x3f
+    0xD1, 0x15,  # draw at V1, V1
+    0x12, 0x00,  # wait for next key
+]
+
+
+class ParseScriptTest(unittest.TestCase):
+    def test_empty_script_has_no_events(self):
+        self.assertEqual([], parse_script([]))
+
+    def test_event_is_parsed(self):
+        self.assertEqual([(10, 0xa, True)], parse_script(['10 a down']))
+
+    def test_events_are_sorted_by_frame(self):
+        events = parse_script(['20 1 up', '10 1 down'])
+        self.assertEqual([(10, 0x1, True), (20, 0x1, False)], events)
+
+    def test_comments_and_blank_lines_are_skipped(self):
+        events = parse_script(['# start', '', '5 f up  # release'])
+        self.assertEqual([(5, 0xf, False)], events)
+
+    def test_invalid_state_is_rejected(self):
+        with self.assertRaises(InvalidScriptError):
+            parse_script(['10 a pressed'])
+
+    def test_invalid_key_is_rejected(self):
+        with self.assertRaises(InvalidScriptError):
+            parse_script(['10 10 down'])
+
+
+class RecordingTest(unittest.TestCase):
+    def test_recorder_stores_key_transitions_with_frame(self):
+        keys = [False] * 16
+        recorder = Recorder(keys, seed=7, schip=True)
+        recorder.record_frame()
+        keys[0x4] = True
+        recorder.record_frame()
+        recorder.record_frame()
+        keys[0x4] = False
+        keys[0xc] = True
+        recorder.record_frame()
+        recording = recorder.recording
+        self.assertEqual(4, recording.frames)
+        self.assertEqual(
+            [(1, 0x4, True), (3, 0x4, False), (3, 0xc, True)],
+            recording.events)
+
+    def test_recorder_keeps_no_events_for_unchanged_keys(self):
+        keys = [False] * 16
+        keys[0x2] = True
+        recorder = Recorder(keys)
+        for _ in range(10):
+            recorder.record_frame()
+        self.assertEqual([], recorder.recording.events)
+
+    def test_player_applies_events_before_their_frame(self):
+        keys = [False] * 16
+        player = Player([(1, 0x4, True), (2, 0x4, False)], keys)
+        pressed = []
+        for _ in range(3):
+            player.play_frame()
+            pressed.append(keys[0x4])
+        self.assertEqual([False, True, False], pressed)
+
+    def test_text_round_trip(self):
+        recording = Recording(1234, True, 90, [(3, 0xa, True)])
+        parsed = parse_recording(recording.to_text().splitlines())
+        self.assertEqual(1234, parsed.seed)
+        self.assertTrue(parsed.schip)
+        self.assertEqual(90, parsed.frames)
+        self.assertEqual([(3, 0xa, True)], parsed.events)
+
+    def test_cycles_per_frame_round_trip(self):
+        recording = Recording(1, False, 2, cycles_per_frame=20)
+        parsed = parse_recording(recording.to_text().splitlines())
+        self.assertEqual(20, parsed.cycles_per_frame)
+
+    def test_cycles_per_frame_optional(self):
+        text = Recording(1, False, 2).to_text()
+        self.assertNotIn('cycles_per_frame', text)
+        self.assertIsNone(parse_recording(text.splitlines()).cycles_per_frame)
+
+    def test_invalid_header_is_rejected(self):
+        with self.assertRaises(InvalidScriptError):
+            parse_recording(['seed x'])
+
+    def test_replay_reproduces_recorded_session(self):
+        live = self.run_live(seed=99, presses={2: 0x3, 5: 0x7, 9: 0xb})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'session.rec')
+            save_recording(live.recording, path)
+            recording = load_recording(path)
+        replayed = run(WAIT_KEYS_PROGRAM, frames=recording.frames,
+                       seed=recording.seed, script=recording.events)
+        self.assertEqual(live.screen_hash, replayed.screen_hash)
+
+    def run_live(self, seed, presses):
+        program = WAIT_KEYS_PROGRAM
+        script = []
+        for frame, key in presses.items():
+            script += [(frame, key, True), (frame + 1, key, False)]
+        result = run(program, frames=12, seed=seed, script=script)
+        keys = [False] * 16
+        recorder = Recorder(keys, seed)
+        player = Player(script, keys)
+        for _ in range(12):
+            player.play_frame()
+            recorder.record_frame()
+        result.recording = recorder.recording
+        return result
+
+
+if __name__ == '__main__':
+    unittest.main()
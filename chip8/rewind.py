@@ -0,0 +1,79 @@
+import zlib
+from collections import deque
+from sys import getsizeof
+
+from chip8.chip8state import SNAPSHOT_SIZE
+
+DEFAULT_CAPACITY = 6 * 1024 * 1024
+KEYFRAME_INTERVAL = 120
+
+
+def to_number(snapshot):
+    return int.from_bytes(snapshot, 'little')
+
+
+def to_snapshot(number):
+    return number.to_bytes(SNAPSHOT_SIZE, 'little')
+
+
+class Chip8Rewind:
+    def __init__(self, capacity=DEFAULT_CAPACITY,
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        self.capacity = capacity
+        self.keyframe_interval = keyframe_interval
+        self.groups = deque()
+        self.keyframe = None
+        self.frames = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.frames
+
+    def clear(self):
+        self.groups.clear()
+        self.keyframe = None
+        self.frames = 0
+        self.size = 0
+
+    def push(self, snapshot):
+        if not self.groups or \
+                len(self.groups[-1][1]) + 1 >= self.keyframe_interval:
+            self.keyframe = to_number(snapshot)
+            encoded = zlib.compress(snapshot, 1)
+            self.groups.append((encoded, []))
+        else:
+            delta = to_snapshot(to_number(snapshot) ^ self.keyframe)
+            encoded = zlib.compress(delta, 1)
+            self.groups[-1][1].append(encoded)
+        self.size += getsizeof(encoded)
+        self.frames += 1
+        while self.size > self.capacity and len(self.groups) > 1:
+            self.drop_oldest()
+
+    def step_back(self):
+        if self.frames < 2:
+            return None
+        self.drop_newest()
+        return self.newest()
+
+    def newest(self):
+        keyframe, deltas = self.groups[-1]
+        if not deltas:
+            return zlib.decompress(keyframe)
+        delta = to_number(zlib.decompress(deltas[-1]))
+        return to_snapshot(delta ^ self.keyframe)
+
+    def drop_newest(self):
+        keyframe, deltas = self.groups[-1]
+        if deltas:
+            self.size -= getsizeof(deltas.pop())
+        else:
+            self.groups.pop()
+            self.size -= getsizeof(keyframe)
+            self.keyframe = to_number(zlib.decompress(self.groups[-1][0]))
+        self.frames -= 1
+
+    def drop_oldest(self):
+        keyframe, deltas = self.groups.popleft()
+        self.size -= getsizeof(keyframe) + sum(map(getsizeof, deltas))
+        self.frames -= 1 + len(deltas)
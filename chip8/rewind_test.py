@@ -0,0 +1,66 @@
+import unittest
+
+from chip8.chip8state import Chip8State
+from chip8.rewind import Chip8Rewind
+
+
+class RewindTest(unittest.TestCase):
+    def setUp(self):
+        self.state = Chip8State()
+        self.rewind = Chip8Rewind(keyframe_interval=4)
+
+    def test_step_back_returns_frames_in_reverse(self):
+        snapshots = self.given_frames(10)
+        for expected in reversed(snapshots[:-1]):
+            self.assertEqual(expected, self.rewind.step_back())
+
+    def test_step_back_keeps_oldest_frame(self):
+        self.given_frames(3)
+        self.rewind.step_back()
+        self.rewind.step_back()
+        self.assertIsNone(self.rewind.step_back())
+        self.assertEqual(1, len(self.rewind))
+
+    def test_frames_pushed_after_step_back_continue_history(self):
+        snapshots = self.given_frames(6)
+        self.rewind.step_back()
+        self.rewind.step_back()
+        self.state.restore(snapshots[3])
+        self.state.PC = 0x300
+        changed = self.state.snapshot()
+        self.rewind.push(changed)
+        self.rewind.push(self.state.snapshot())
+        self.assertEqual(changed, self.rewind.step_back())
+        self.assertEqual(snapshots[3], self.rewind.step_back())
+
+    def test_oldest_frames_are_dropped_over_capacity(self):
+        self.rewind.capacity = 0
+        snapshots = self.given_frames(10)
+        self.assertLess(len(self.rewind), 10)
+        self.assertEqual(snapshots[-2], self.rewind.step_back())
+
+    def test_unchanged_frames_take_little_space(self):
+        self.rewind.keyframe_interval = 100
+        self.given_frames(100)
+        self.assertLess(self.rewind.size, 100 * 200)
+
+    def test_clear_forgets_history(self):
+        self.given_frames(5)
+        self.rewind.clear()
+        self.assertEqual(0, len(self.rewind))
+        self.assertEqual(0, self.rewind.size)
+
+    def given_frames(self, count):
+        snapshots = []
+        for frame in range(count):
+            self.state.registers[frame % 0x10] += 1
+            self.state.memory[0xf00 + frame] ^= 0xff
+            self.state.PC = 0x200 + 2 * frame
+            snapshot = self.state.snapshot()
+            snapshots.append(snapshot)
+            self.rewind.push(snapshot)
+        return snapshots
+
+
+if __name__ == '__main__':
+    unittest.main()
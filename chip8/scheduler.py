@@ -0,0 +1,41 @@
+import time
+
+MAX_CATCH_UP = 6
+
+
+class FrameScheduler:
+    def __init__(self, rate, max_frames=MAX_CATCH_UP,
+                 clock=time.perf_counter):
+        self.period = 1.0 / rate
+        self.max_frames = max_frames
+        self.clock = clock
+        self.next_frame = None
+
+    def reset(self):
+        self.next_frame = None
+
+    def due_frames(self):
+        now = self.clock()
+        if self.next_frame is None:
+            self.next_frame = now
+        if now < self.next_frame:
+            return 0
+        frames = int((now - self.next_frame) / self.period) + 1
+        if frames > self.max_frames:
+            # too far behind to catch up, drop the backlog
+            self.next_frame = now + self.period
+            return self.max_frames
+        self.next_frame += frames * self.period
+        return frames
+
+    def time_to_next_frame(self):
+        if self.next_frame is None:
+            return 0.0
+        return max(self.next_frame - self.clock(), 0.0)
+
+
+def can_wait_for_input(idle, state, frames):
+    # only block when nothing changes until a key arrives, and every
+    # published row has been drawn; the display may be out of phase
+    return idle and state.DT == 0 and state.ST == 0 and \
+        not frames.dirty_rows
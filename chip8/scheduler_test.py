@@ -0,0 +1,87 @@
+import unittest
+
+from chip8.chip8cpu import Chip8Cpu
+from chip8.chip8gpu import Chip8Gpu
+from chip8.chip8state import Chip8State
+from chip8.framebuffer import Chip8FrameBuffer
+from chip8.scheduler import FrameScheduler, can_wait_for_input
+
+KEY_PROMPT = [
+    0xA2, 0x06,  # I = 0x206
+    0xD0, 0x01,  # draw
+    0xF0, 0x0A,  # wait for key
+    0xFF,
+]
+
+
+class FrameSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 10.0
+        self.scheduler = FrameScheduler(50, 4, lambda: self.now)
+
+    def test_first_frame_due_at_once(self):
+        self.assertEqual(1, self.scheduler.due_frames())
+        self.assertEqual(0, self.scheduler.due_frames())
+
+    def test_frames_due_by_elapsed_time(self):
+        self.scheduler.due_frames()
+        self.when_time_passes(0.019)
+        self.assertEqual(0, self.scheduler.due_frames())
+        self.when_time_passes(0.042)
+        self.assertEqual(3, self.scheduler.due_frames())
+        self.assertAlmostEqual(0.019, self.scheduler.time_to_next_frame())
+
+    def test_late_frames_are_caught_up(self):
+        self.scheduler.due_frames()
+        self.when_time_passes(0.045)
+        self.assertEqual(2, self.scheduler.due_frames())
+        self.when_time_passes(0.016)
+        self.assertEqual(1, self.scheduler.due_frames())
+
+    def test_backlog_beyond_limit_is_dropped(self):
+        self.scheduler.due_frames()
+        self.when_time_passes(1.0)
+        self.assertEqual(4, self.scheduler.due_frames())
+        self.assertEqual(0, self.scheduler.due_frames())
+        self.assertAlmostEqual(0.02, self.scheduler.time_to_next_frame())
+
+    def test_reset_starts_over(self):
+        self.scheduler.due_frames()
+        self.scheduler.reset()
+        self.when_time_passes(0.5)
+        self.assertEqual(1, self.scheduler.due_frames())
+
+    def when_time_passes(self, seconds):
+        self.now += seconds
+
+
+class WaitForInputTest(unittest.TestCase):
+    def setUp(self):
+        self.state = Chip8State()
+        self.state.load_program(KEY_PROMPT)
+        self.cpu = Chip8Cpu(self.state, lambda: 0, Chip8Gpu(self.state))
+        self.frames = Chip8FrameBuffer()
+        self.frames.publish(self.state)
+        self.frames.take_dirty_rows()
+
+    def test_prompt_is_drawn_before_waiting(self):
+        idle = self.cpu.run(9)
+        self.frames.publish(self.state)
+        self.assertTrue(idle)
+        self.assertFalse(can_wait_for_input(idle, self.state, self.frames))
+        self.assertEqual(0b1, self.frames.take_dirty_rows())
+        self.assertTrue(can_wait_for_input(idle, self.state, self.frames))
+
+    def test_running_timers_keep_the_loop_awake(self):
+        self.state.DT = 1
+        self.assertFalse(can_wait_for_input(True, self.state, self.frames))
+        self.state.DT = 0
+        self.state.ST = 1
+        self.assertFalse(can_wait_for_input(True, self.state, self.frames))
+
+    def test_busy_program_is_not_waited_on(self):
+        self.assertFalse(can_wait_for_input(False, self.state, self.frames))
+
+
+if __name__ == '__main__':
+    unittest.main()
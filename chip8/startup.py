@@ -0,0 +1,23 @@
+import time
+
+STARTED = time.perf_counter()
+
+
+class StartupTimer:
+    def __init__(self, started=STARTED, clock=time.perf_counter):
+        self.clock = clock
+        self.started = started
+        self.last = started
+        self.phases = []
+
+    def mark(self, name):
+        now = self.clock()
+        self.phases.append((name, now - self.last, now - self.started))
+        self.last = now
+
+    def to_text(self):
+        lines = ['startup time: self [us] | cumulative | phase']
+        for name, own, total in self.phases:
+            lines.append('startup time: {:>9.0f} | {:>10.0f} | {}'.format(
+                own * 1e6, total * 1e6, name))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,30 @@
+import unittest
+
+from chip8.startup import StartupTimer
+
+
+class StartupTimerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1.0
+        self.timer = StartupTimer(1.0, lambda: self.now)
+
+    def test_phase_has_own_and_cumulative_time(self):
+        self.now = 1.25
+        self.timer.mark('imports')
+        self.now = 1.5
+        self.timer.mark('window')
+        self.assertEqual([('imports', 0.25, 0.25), ('window', 0.25, 0.5)],
+                         self.timer.phases)
+
+    def test_text_in_microseconds(self):
+        self.now = 1.002
+        self.timer.mark('imports')
+        lines = self.timer.to_text().splitlines()
+        self.assertEqual('startup time: self [us] | cumulative | phase',
+                         lines[0])
+        self.assertEqual('startup time:      2000 |       2000 | imports',
+                         lines[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
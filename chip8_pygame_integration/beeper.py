@@ -0,0 +1,75 @@
+import time
+from array import array
+from collections import deque
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 44100
+AUDIO_BUFFER = 256
+BEEP_FREQUENCY = 440
+VOLUME = 0.2
+
+
+def square_wave(frequency, sample_rate, volume=VOLUME):
+    period = max(round(sample_rate / frequency), 2)
+    amplitude = round(volume * 0x7fff)
+    high = period // 2
+    return [amplitude] * high + [-amplitude] * (period - high)
+
+
+def make_beep(frequency, sample_rate, channels):
+    samples = square_wave(frequency, sample_rate)
+    if np is not None:
+        wave = np.array(samples, np.int16)
+        if channels > 1:
+            wave = np.repeat(wave[:, np.newaxis], channels, 1)
+        return pygame.sndarray.make_sound(wave)
+    interleaved = array('h', (sample for sample in samples
+                              for _ in range(channels)))
+    return pygame.mixer.Sound(buffer=interleaved.tobytes())
+
+
+def create_beeper(frequency=BEEP_FREQUENCY, buffer=AUDIO_BUFFER):
+    pygame.mixer.init(SAMPLE_RATE, -16, 1, buffer)
+    sample_rate, _, channels = pygame.mixer.get_init()
+    return Beeper(make_beep(frequency, sample_rate, channels))
+
+
+class Beeper:
+    def __init__(self, sound, clock=time.perf_counter):
+        self.sound = sound
+        self.clock = clock
+        self.playing = False
+        self.edges = deque()
+
+    def schedule(self, delay, on):
+        self.edges.append((self.clock() + delay, on))
+
+    def update(self):
+        edges = self.edges
+        now = self.clock()
+        while edges and edges[0][0] <= now:
+            self.set_playing(edges.popleft()[1])
+
+    def follow(self, on):
+        # catches up with timer changes made outside the cpu,
+        # like reset, rewind or loading a state
+        if not self.edges:
+            self.set_playing(on)
+
+    def time_to_next_edge(self):
+        if not self.edges:
+            return None
+        return max(self.edges[0][0] - self.clock(), 0.0)
+
+    def set_playing(self, on):
+        if on and not self.playing:
+            self.sound.play(-1)
+        elif not on and self.playing:
+            self.sound.stop()
+        self.playing = on
@@ -0,0 +1,78 @@
+import unittest
+from chip8_pygame_integration.beeper import Beeper, square_wave
+
+
+class SoundMock:
+    def __init__(self):
+        self.calls = []
+
+    def play(self, loops=0):
+        self.calls.append(('play', loops))
+
+    def stop(self):
+        self.calls.append(('stop',))
+
+
+class SquareWaveTest(unittest.TestCase):
+    def test_one_period_of_samples(self):
+        self.assertEqual(100, len(square_wave(441, 44100)))
+
+    def test_first_half_high_second_half_low(self):
+        wave = square_wave(441, 44100, 0.5)
+        self.assertEqual([0x4000] * 50 + [-0x4000] * 50, wave)
+
+    def test_odd_period_is_not_shortened(self):
+        self.assertEqual(101, len(square_wave(440, 44440)))
+
+    def test_frequency_above_half_sample_rate_keeps_two_samples(self):
+        self.assertEqual(2, len(square_wave(30000, 44100)))
+
+
+class BeeperTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 5.0
+        self.sound = SoundMock()
+        self.beeper = Beeper(self.sound, lambda: self.now)
+
+    def test_edge_applied_only_when_due(self):
+        self.beeper.schedule(0.004, True)
+        self.beeper.update()
+        self.assertEqual([], self.sound.calls)
+        self.when_time_passes(0.005)
+        self.beeper.update()
+        self.assertEqual([('play', -1)], self.sound.calls)
+
+    def test_edges_applied_in_order(self):
+        self.beeper.schedule(0.001, True)
+        self.beeper.schedule(0.002, False)
+        self.when_time_passes(0.003)
+        self.beeper.update()
+        self.assertEqual([('play', -1), ('stop',)], self.sound.calls)
+        self.assertFalse(self.beeper.playing)
+
+    def test_repeated_edge_does_not_restart_sound(self):
+        self.beeper.set_playing(True)
+        self.beeper.set_playing(True)
+        self.assertEqual([('play', -1)], self.sound.calls)
+
+    def test_time_to_next_edge(self):
+        self.assertIsNone(self.beeper.time_to_next_edge())
+        self.beeper.schedule(0.01, True)
+        self.when_time_passes(0.004)
+        self.assertAlmostEqual(0.006, self.beeper.time_to_next_edge())
+
+    def test_follow_waits_for_pending_edges(self):
+        self.beeper.schedule(0.01, True)
+        self.beeper.follow(False)
+        self.assertEqual([], self.sound.calls)
+        self.when_time_passes(0.01)
+        self.beeper.update()
+        self.beeper.follow(False)
+        self.assertEqual([('play', -1), ('stop',)], self.sound.calls)
+
+    def when_time_passes(self, seconds):
+        self.now += seconds
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import pygame
 from chip8_pygame_integration.key_bind import KeyBind
 
@@ -6,11 +8,6 @@ def reverse_dictionary(dict):
     return {number: key for key, number in dict.items()}
 
 
-PYGAME_ITEMS = vars(pygame).items()
-PYGAME_KEYS = {k[2:]: v for k, v in PYGAME_ITEMS if 'K_' in k}
-PYGAME_KEYS_BY_NUMBER = reverse_dictionary(PYGAME_KEYS)
-PYGAME_KMODS = {k[5:].lower(): v for k, v in PYGAME_ITEMS if 'KMOD_' in k}
-PYGAME_KMODS_BY_NUMBER = reverse_dictionary(PYGAME_KMODS)
 INVALID_LENGTH = 'Line {} \'{}\' has invalid length - use {} entries'
 INVALID_KEY = 'Invalid key in line {}: {}'
 CHIP8_PATTERN = (
@@ -19,10 +16,25 @@ CHIP8_PATTERN = (
     (0x7, 0x8, 0x9, 0xE),
     (0xA, 0x0, 0xB, 0xF),
     ('step',),
-    ('reset',)
+    ('reset',),
+    ('save_state', 'load_state'),
+    ('rewind',),
+    ('faster', 'slower'),
+    ('fast_forward',),
 )
 
 
+@lru_cache(maxsize=None)
+def get_pygame_keys_by_number():
+    keys = {k[2:]: v for k, v in vars(pygame).items() if 'K_' in k}
+    return reverse_dictionary(keys)
+
+
+@lru_cache(maxsize=None)
+def get_pygame_kmods():
+    return {k[5:].lower(): v for k, v in vars(pygame).items() if 'KMOD_' in k}
+
+
 def get_config_chip8(lines, default):
     return get_config(CHIP8_PATTERN, lines, default)
 
@@ -48,7 +60,12 @@ def get_config(pattern, lines, default=None):
         else:
             print(INVALID_LENGTH.format(line_no, line, commands_length))
             return default
-    return binds
+    return binds + get_missing_binds(pattern[len(lines):], default)
+
+
+def get_missing_binds(pattern, default):
+    commands = [command for commands in pattern for command in commands]
+    return [bind for bind in default or [] if bind.command in commands]
 
 
 def get_bind(command, inputKey):
@@ -106,7 +123,7 @@ def to_repr(bind):
     elements += get_first_mod(bind, 'alt', 'lalt', 'ralt')
     elements += get_first_mod(bind, 'meta', 'lmeta', 'rmeta')
     elements += get_all_mods(bind, 'caps', 'num', 'mode')
-    elements.append(PYGAME_KEYS_BY_NUMBER[bind.key])
+    elements.append(get_pygame_keys_by_number()[bind.key])
 
     return '+'.join(elements)
 
@@ -123,7 +140,7 @@ def get_all_mods(bind, *mods):
 
 
 def has_mod(bind, modName):
-    mod = PYGAME_KMODS[modName]
+    mod = get_pygame_kmods()[modName]
     return bind.keyMod & mod == mod
 
 
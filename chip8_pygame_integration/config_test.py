@@ -38,6 +38,16 @@ class ConfigLoadTest(unittest.TestCase):
         self.when_default_is(DEFAULT)
         self.expect_config(DEFAULT)
 
+    def test_lines_missing_at_end_are_taken_from_default(self):
+        self.when_pattern_is((('comm1',), ('comm2',)))
+        self.when_lines_are(['A'])
+        self.when_default_is([
+            KeyBind(pygame.K_b, pygame.KMOD_NONE, 'comm1'),
+            KeyBind(pygame.K_c, pygame.KMOD_NONE, 'comm2')])
+        self.expect_config([
+            KeyBind(pygame.K_a, pygame.KMOD_NONE, 'comm1'),
+            KeyBind(pygame.K_c, pygame.KMOD_NONE, 'comm2')])
+
     def test_ctrl_is_parsed_as_KMOD_CTRL(self):
         self.when_pattern_is((('comm1',),))
         self.when_lines_are(['ctrl+A'])
@@ -1,3 +1,16 @@
+import pygame
+
+# lock keys do not change what a key means, so they are ignored unless a
+# bind asks for them
+LOCK_MODS = pygame.KMOD_CAPS | pygame.KMOD_NUM | pygame.KMOD_MODE
+SIDED_MODS = (
+    (pygame.KMOD_CTRL, pygame.KMOD_LCTRL, pygame.KMOD_RCTRL),
+    (pygame.KMOD_SHIFT, pygame.KMOD_LSHIFT, pygame.KMOD_RSHIFT),
+    (pygame.KMOD_ALT, pygame.KMOD_LALT, pygame.KMOD_RALT),
+    (pygame.KMOD_META, pygame.KMOD_LMETA, pygame.KMOD_RMETA),
+)
+
+
 class KeyBind:
     def __init__(self, key, keyMod, command):
         self.key = key
@@ -11,8 +24,8 @@ class KeyBind:
         return keysMatch and modsMatch and commandsMatch
 
     def matches(self, event):
-        isKey = hasattr(event, 'key') and hasattr(event, 'mod')
-        return isKey and self.key == event.key and self.keyMod == event.mod
+        key = getattr(event, 'key', None)
+        return key == self.key and self.keyMod == getattr(event, 'mod', 0)
 
     def __str__(self):
         return self.__get_str(' ')
@@ -29,3 +42,39 @@ def find_command(binds, event):
         if bind.matches(event):
             return bind.command
     return None
+
+
+class KeyIndex:
+    def __init__(self, binds=()):
+        self.commands = {}
+        self.rebuild(binds)
+
+    def rebuild(self, binds):
+        commands = {}
+        for bind in binds:
+            for mod in get_mod_variants(bind.keyMod):
+                commands.setdefault((bind.key, mod), []).append(bind.command)
+        self.commands = {key: tuple(found) for key, found in commands.items()}
+
+    def find_commands(self, event):
+        key = getattr(event, 'key', None)
+        if key is None:
+            return ()
+        mod = getattr(event, 'mod', 0)
+        commands = self.commands.get((key, mod))
+        if commands is None:
+            commands = self.commands.get((key, mod & ~LOCK_MODS), ())
+        return commands
+
+    def find_command(self, event):
+        commands = self.find_commands(event)
+        return commands[0] if commands else None
+
+
+def get_mod_variants(mod):
+    variants = [mod]
+    for both, left, right in SIDED_MODS:
+        if mod & both == both:
+            variants = [variant & ~both | side for variant in variants
+                        for side in (left, right, both)]
+    return variants
@@ -1,6 +1,7 @@
 import pygame
 import unittest
-from chip8_pygame_integration.key_bind import KeyBind, find_command
+from chip8_pygame_integration.key_bind import KeyBind, KeyIndex, \
+    find_command
 
 
 class KeyBindTest(unittest.TestCase):
@@ -62,6 +63,64 @@ class FindEventTest(unittest.TestCase):
         self.assertEqual(command, find_command(self.commands, self.event))
 
 
+class KeyIndexTest(unittest.TestCase):
+    def test_event_without_key_finds_nothing(self):
+        self.when_binds_are(KeyBind(pygame.K_a, pygame.KMOD_NONE, 'c1'))
+        self.assertEqual((), self.index.find_commands(non_key_event()))
+        self.assertIsNone(self.index.find_command(non_key_event()))
+
+    def test_event_without_mod_matches_plain_key(self):
+        bind = KeyBind(pygame.K_a, pygame.KMOD_NONE, 'c1')
+        self.when_binds_are(bind)
+        event = key_event(pygame.K_a)
+        del event.mod
+        self.assertEqual(('c1',), self.index.find_commands(event))
+        self.assertEqual('c1', find_command([bind], event))
+
+    def test_key_and_mods_select_command(self):
+        self.when_binds_are(KeyBind(pygame.K_a, pygame.KMOD_NONE, 'c1'),
+                            KeyBind(pygame.K_a, pygame.KMOD_LSHIFT, 'c2'),
+                            KeyBind(pygame.K_b, pygame.KMOD_NONE, 'c3'))
+        self.expect_commands(key_event(pygame.K_a), 'c1')
+        self.expect_commands(key_event(pygame.K_a, pygame.KMOD_LSHIFT), 'c2')
+        self.expect_commands(key_event(pygame.K_b), 'c3')
+        self.expect_commands(key_event(pygame.K_b, pygame.KMOD_LALT))
+
+    def test_lock_keys_are_ignored(self):
+        self.when_binds_are(KeyBind(pygame.K_a, pygame.KMOD_LCTRL, 'c1'))
+        mods = pygame.KMOD_LCTRL | pygame.KMOD_CAPS | pygame.KMOD_NUM
+        self.expect_commands(key_event(pygame.K_a, mods), 'c1')
+
+    def test_lock_key_can_be_bound(self):
+        self.when_binds_are(KeyBind(pygame.K_a, pygame.KMOD_NONE, 'c1'),
+                            KeyBind(pygame.K_a, pygame.KMOD_CAPS, 'c2'))
+        self.expect_commands(key_event(pygame.K_a, pygame.KMOD_CAPS), 'c2')
+
+    def test_generic_mod_matches_either_side(self):
+        self.when_binds_are(KeyBind(pygame.K_r, pygame.KMOD_CTRL, 'c1'))
+        self.expect_commands(key_event(pygame.K_r, pygame.KMOD_LCTRL), 'c1')
+        self.expect_commands(key_event(pygame.K_r, pygame.KMOD_RCTRL), 'c1')
+        self.expect_commands(key_event(pygame.K_r, pygame.KMOD_CTRL), 'c1')
+
+    def test_key_can_have_many_commands(self):
+        self.when_binds_are(KeyBind(pygame.K_a, pygame.KMOD_NONE, 'c1'),
+                            KeyBind(pygame.K_a, pygame.KMOD_NONE, 'c2'))
+        self.expect_commands(key_event(pygame.K_a), 'c1', 'c2')
+        self.assertEqual('c1', self.index.find_command(key_event(pygame.K_a)))
+
+    def test_rebuild_replaces_binds(self):
+        self.when_binds_are(KeyBind(pygame.K_a, pygame.KMOD_NONE, 'c1'))
+        self.index.rebuild([KeyBind(pygame.K_b, pygame.KMOD_NONE, 'c1')])
+        self.expect_commands(key_event(pygame.K_a))
+        self.expect_commands(key_event(pygame.K_b), 'c1')
+
+    def when_binds_are(self, *binds):
+        self.index = KeyIndex(binds)
+
+    def expect_commands(self, event, *commands):
+        self.assertEqual(commands, self.index.find_commands(event))
+
+
 def key_event(key, mod=pygame.KMOD_NONE):
     return MockEvent(pygame.KEYUP, key, mod)
 
@@ -0,0 +1,47 @@
+import pygame
+
+from chip8.blitter import blit_screen, blit_screen_loop, \
+    blit_screen_numpy, dirty_bands
+
+
+class Chip8Screen:
+    def __init__(self, screen, scale, area, timed=None):
+        self.screen = screen
+        self.scale = scale
+        self.area = area
+        self.surface = pygame.Surface((64, 32), 0, screen)
+        self.off_colour = screen.map_rgb(0, 50, 0)
+        self.on_colour = screen.map_rgb(0, 255, 0)
+        # surfarray cannot map 24 bit surfaces, those go through a
+        # PixelArray, which only the loop blitter can write to
+        self.direct = blit_screen is blit_screen_numpy and \
+            screen.get_bytesize() != 3
+        blit = blit_screen if self.direct else blit_screen_loop
+        self.blit = blit if timed is None else timed('blit', blit)
+
+    def draw(self, frames):
+        rows = frames.take_dirty_rows()
+        if not rows:
+            return []
+        scale = self.scale
+        area = self.area
+        rects = [pygame.Rect(area.left, area.top + first * scale,
+                             area.width, height * scale)
+                 for first, height in dirty_bands(rows)]
+        if self.direct:
+            pixels = pygame.surfarray.pixels2d(self.screen)[
+                area.left: area.right, area.top: area.bottom]
+            self.blit(frames, self.off_colour, self.on_colour, pixels, rows,
+                      scale)
+            del pixels
+            return rects
+        pixels = pygame.PixelArray(self.surface)
+        self.blit(frames, self.off_colour, self.on_colour, pixels, rows)
+        del pixels
+        for rect in rects:
+            first = (rect.top - area.top) // scale
+            source = self.surface.subsurface(
+                (0, first, 64, rect.height // scale))
+            pygame.transform.scale(source, rect.size,
+                                   self.screen.subsurface(rect))
+        return rects
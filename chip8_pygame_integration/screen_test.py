@@ -0,0 +1,49 @@
+import pygame
+import unittest
+from chip8.blitter import blit_screen_loop
+from chip8.framebuffer import Chip8FrameBuffer
+from chip8_pygame_integration.screen import Chip8Screen
+
+
+class Chip8ScreenTest(unittest.TestCase):
+    def setUp(self):
+        self.frames = Chip8FrameBuffer()
+        self.frames.memory[0] = 0x80
+
+    def test_24_bit_surface_is_drawn_through_pixel_array(self):
+        surface = pygame.Surface((200, 100), 0, 24)
+        painter = self.given_screen(surface)
+        self.assertFalse(painter.direct)
+        self.assertIs(blit_screen_loop, painter.blit)
+        painter.draw(self.frames)
+        self.assert_first_pixel_lit(surface)
+
+    def test_32_bit_surface_is_drawn(self):
+        surface = pygame.Surface((200, 100), 0, 32)
+        painter = self.given_screen(surface)
+        painter.draw(self.frames)
+        self.assert_first_pixel_lit(surface)
+
+    def test_dirty_rows_are_returned_as_rects(self):
+        painter = self.given_screen(pygame.Surface((200, 100), 0, 32))
+        self.frames.take_dirty_rows()
+        self.frames.dirty_rows = 0b110
+        self.assertEqual([pygame.Rect(4, 5, 192, 6)],
+                         painter.draw(self.frames))
+        self.assertEqual([], painter.draw(self.frames))
+
+    def given_screen(self, surface):
+        area = pygame.Rect(4, 2, 64 * 3, 32 * 3)
+        return Chip8Screen(surface, 3, area)
+
+    def assert_first_pixel_lit(self, surface):
+        on = surface.unmap_rgb(surface.map_rgb(0, 255, 0))
+        off = surface.unmap_rgb(surface.map_rgb(0, 50, 0))
+        self.assertEqual(on, surface.get_at((4, 2)))
+        self.assertEqual(on, surface.get_at((6, 4)))
+        self.assertEqual(off, surface.get_at((7, 2)))
+        self.assertEqual(off, surface.get_at((4, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,33 @@
+from chip8.startup import StartupTimer
 import pygame
-from random import randrange
-from sys import argv
-from chip8.blitter import blit_screen
-from chip8.chip8state import Chip8State
+import time
+from random import Random, randrange
+from sys import argv, stderr
+from chip8.analysis import get_cache_directory, load_analysis
+from chip8.chip8state import ALL_ROWS, Chip8State, InvalidSnapshotError, \
+    screen_hash
 from chip8.chip8cpu import Chip8Cpu
 from chip8.chip8gpu import Chip8Gpu
+from chip8.framebuffer import Chip8FrameBuffer
+from chip8.profiler import Chip8Profiler
+from chip8.recording import Player, Recorder, load_recording, \
+    save_recording
+from chip8.rewind import Chip8Rewind, DEFAULT_CAPACITY
+from chip8.scheduler import FrameScheduler, can_wait_for_input
+from chip8_pygame_integration.beeper import AUDIO_BUFFER, BEEP_FREQUENCY, \
+    create_beeper
 from chip8_pygame_integration.config import get_config_chip8, to_text_chip8
-from chip8_pygame_integration.key_bind import find_command, KeyBind
+from chip8_pygame_integration.key_bind import KeyBind, KeyIndex
+from chip8_pygame_integration.screen import Chip8Screen
+
+startup = StartupTimer()
+startup.mark('imports')
 
 CYCLES_PER_FRAME = 9
+FRAME_RATE = 60
+DISPLAY_RATE = 60
+FAST_FORWARD_FRAMES = 10
+WINDOW_SIZE = (800, 600)
 
 key_numbers = [
     KeyBind(pygame.K_0, pygame.KMOD_NONE, 0x0),
@@ -29,6 +48,12 @@ key_numbers = [
     KeyBind(pygame.K_f, pygame.KMOD_NONE, 0xF),
     KeyBind(pygame.K_SPACE, pygame.KMOD_NONE, 'step'),
     KeyBind(pygame.K_p, pygame.KMOD_NONE, 'reset'),
+    KeyBind(pygame.K_F5, pygame.KMOD_NONE, 'save_state'),
+    KeyBind(pygame.K_F9, pygame.KMOD_NONE, 'load_state'),
+    KeyBind(pygame.K_BACKSPACE, pygame.KMOD_NONE, 'rewind'),
+    KeyBind(pygame.K_EQUALS, pygame.KMOD_NONE, 'faster'),
+    KeyBind(pygame.K_MINUS, pygame.KMOD_NONE, 'slower'),
+    KeyBind(pygame.K_TAB, pygame.KMOD_NONE, 'fast_forward'),
 ]
 
 
@@ -45,49 +70,196 @@ def save_keys():
         file.writelines(to_text_chip8(key_numbers))
 
 
-screenSurface = pygame.Surface((64, 32))
-scaledSurface = pygame.Surface((640, 320))
-offColour = screenSurface.map_rgb(0, 50, 0)
-onColour = screenSurface.map_rgb(0, 255, 0)
+def get_window_size(options):
+    if options['window']:
+        width, height = options['window']
+    elif options['fullscreen']:
+        return 0, 0
+    else:
+        width, height = WINDOW_SIZE
+    if options['scale']:
+        width = max(width, 64 * options['scale'])
+        height = max(height, 32 * options['scale'])
+    return width, height
 
 
-def draw_screen(state):
-    screenSurfaceArray = pygame.PixelArray(screenSurface)
-    blit_screen(state, offColour, onColour, screenSurfaceArray)
-    pygame.transform.scale(screenSurface, (640, 320), scaledSurface)
-    screen.blit(scaledSurface, (80, 20))
+def get_screen_area(window_size, scale):
+    largest = max(1, min(window_size[0] // 64, window_size[1] // 32))
+    scale = min(scale or largest, largest)
+    area = pygame.Rect(0, 0, 64 * scale, 32 * scale)
+    area.center = (window_size[0] // 2, window_size[1] // 2)
+    return scale, area
 
 
 def load_program(state, name):
     with open(name, "rb") as inFile:
         program = inFile.read()
         state.load_program(program)
+    return program
+
+
+def get_state_file():
+    return options['file'] + '.state'
+
+
+def save_state():
+    state.save(get_state_file())
+
+
+def load_state():
+    keys = bytes(state.keys)
+    try:
+        state.load(get_state_file())
+        # the file holds the keypad of the saved frame, not the live one
+        state.keys[:] = keys
+    except FileNotFoundError:
+        print('No saved state in {}'.format(get_state_file()))
+    except InvalidSnapshotError as e:
+        print('Cannot load {}: {}'.format(get_state_file(), e.message))
+
+
+def rewind_frame():
+    snapshot = history.step_back()
+    if snapshot is not None:
+        keys = bytes(state.keys)
+        state.restore(snapshot)
+        state.keys[:] = keys
+
+
+def play_frame():
+    global player
+    player.play_frame()
+    if player.frame >= recording.frames:
+        print('Replay finished at frame {}, screen hash {}'.format(
+            player.frame, screen_hash(state)), flush=True)
+        player = None
 
 
 def simulate_cpu(cpu):
-    for i in range(CYCLES_PER_FRAME):
-        cpu.tick()
+    return cpu.run(cycles_per_frame)
+
+
+def set_speed(cycles):
+    global cycles_per_frame
+    cycles_per_frame = max(cycles, 1)
+    cpu.set_clock_speed(cycles_per_frame * FRAME_RATE)
+
+
+def is_session_locked(action):
+    # a recording replays only if nothing outside the keypad changed it
+    if player is not None or recorder is not None:
+        print('{} is disabled while recording or replaying'.format(action))
+        return True
+    return False
+
+
+def change_speed(change):
+    if is_session_locked('Changing the speed'):
+        return
+    set_speed(cycles_per_frame + change)
+    print('Speed: {} instructions per second'.format(cpu.clock_speed))
+
+
+def get_events(idle):
+    if can_wait_for_input(idle, state, frames) and not sound_pending():
+        events = [pygame.event.wait()] + pygame.event.get()
+        emulation.reset()
+        return events
+    return pygame.event.get()
+
+
+def run_frame():
+    if player is not None:
+        play_frame()
+    if recorder is not None:
+        recorder.record_frame()
+    idle = simulate_cpu(cpu)
+    history.push(state.snapshot())
+    return idle
+
+
+def wait_for_next_frame():
+    delay = min(emulation.time_to_next_frame(),
+                display.time_to_next_frame())
+    if sound_pending():
+        delay = min(delay, beeper.time_to_next_edge())
+    if delay > 0:
+        time.sleep(delay)
+
+
+def get_beeper():
+    global beeper
+    if beeper is None:
+        beeper = create_beeper(options['beep_frequency'],
+                               options['audio_buffer'])
+    return beeper
+
+
+def sound_pending():
+    return beeper is not None and bool(beeper.edges)
+
+
+def schedule_sound(start_cycles, fast_forward):
+    edges = cpu.sound_edges
+    if beeper is not None or any(on for _, on in edges):
+        for cycle, on in edges:
+            delay = 0 if fast_forward else \
+                (cycle - start_cycles) / cpu.clock_speed
+            get_beeper().schedule(delay, on)
+    edges.clear()
 
 
 def update_sound():
-    if state.ST > 0:
-        if not sound_playing:
-            sound.play()
-    else:
-        if sound_playing:
-            sound.stop()
-    return state.ST > 0
+    if beeper is None:
+        if state.ST > 0:
+            get_beeper().follow(True)
+        return
+    beeper.update()
+    beeper.follow(state.ST > 0)
 
 
 def get_options(args):
     options = args[2:]
-    values = {'schip': False, 'stop_every_frame': False}
+    values = {'schip': False, 'stop_every_frame': False, 'profile': None,
+              'rewind_memory': DEFAULT_CAPACITY, 'record': None,
+              'speed': CYCLES_PER_FRAME * FRAME_RATE,
+              'fast_forward': FAST_FORWARD_FRAMES,
+              'replay': None, 'scale': None, 'window': None,
+              'fullscreen': False, 'startup_times': False,
+              'audio_buffer': AUDIO_BUFFER, 'beep_frequency': BEEP_FREQUENCY}
     values['file'] = args[1]
     for option in options:
         if option == '--schip':
             values['schip'] = True
         elif option == '--stop-every-frame':
             values['stop_every_frame'] = True
+        elif option.startswith('--profile='):
+            values['profile'] = option[len('--profile='):]
+        elif option.startswith('--rewind-memory='):
+            megabytes = float(option[len('--rewind-memory='):])
+            values['rewind_memory'] = int(megabytes * 1024 * 1024)
+        elif option.startswith('--record='):
+            values['record'] = option[len('--record='):]
+        elif option.startswith('--speed='):
+            values['speed'] = int(option[len('--speed='):])
+        elif option.startswith('--fast-forward='):
+            values['fast_forward'] = int(option[len('--fast-forward='):])
+        elif option.startswith('--replay='):
+            values['replay'] = option[len('--replay='):]
+        elif option.startswith('--scale='):
+            values['scale'] = int(option[len('--scale='):])
+        elif option.startswith('--window='):
+            size = option[len('--window='):].split('x')
+            values['window'] = (int(size[0]), int(size[1]))
+        elif option == '--fullscreen':
+            values['fullscreen'] = True
+        elif option == '--startup-times':
+            values['startup_times'] = True
+        elif option.startswith('--audio-buffer='):
+            values['audio_buffer'] = int(option[len('--audio-buffer='):])
+        elif option.startswith('--beep-frequency='):
+            values['beep_frequency'] = int(
+                option[len('--beep-frequency='):])
     return values
 
 
@@ -97,63 +269,150 @@ def set_window_icon():
 
 
 if len(argv) == 1:
-    print('Usage: {} program [--schip] [--stop-every-frame]'.format(argv[0]))
+    print('Usage: {} program [--schip] [--stop-every-frame] '
+          '[--profile=file] [--rewind-memory=MB] [--record=file] '
+          '[--replay=file] [--scale=N] [--window=WIDTHxHEIGHT] '
+          '[--fullscreen] [--speed=instructions per second] '
+          '[--fast-forward=frames] [--startup-times] '
+          '[--audio-buffer=samples] [--beep-frequency=Hz]'.format(argv[0]))
     exit()
 
 
-def get_command(event):
-    return find_command(key_numbers, event)
+def get_commands(event):
+    return key_index.find_commands(event)
 
 
 def reset():
     state.reset()
-    load_program(state, options['file'])
+    program = load_program(state, options['file'])
+    cpu.prepare(load_analysis(program, get_cache_directory()))
+    history.push(state.snapshot())
 
 
-pygame.init()
+options = get_options(argv)
+
+pygame.display.init()
 set_window_icon()
 pygame.display.set_caption('Chip 8')
-screen = pygame.display.set_mode((800, 600))
-clock = pygame.time.Clock()
-
-pygame.mixer.init()
-sound = pygame.mixer.Sound('sound.mp3')
-sound_playing = False
-
-options = get_options(argv)
+flags = pygame.FULLSCREEN if options['fullscreen'] else 0
+screen = pygame.display.set_mode(get_window_size(options), flags)
+scale, screen_area = get_screen_area(screen.get_size(), options['scale'])
+
+startup.mark('window')
+beeper = None
+
+seed = randrange(0x100000000)
+schip = options['schip']
+cycles_per_frame = round(options['speed'] / FRAME_RATE)
+player = None
+if options['replay']:
+    recording = load_recording(options['replay'])
+    seed, schip = recording.seed, recording.schip
+    cycles_per_frame = recording.cycles_per_frame or CYCLES_PER_FRAME
 
 state = Chip8State()
 gpu = Chip8Gpu(state)
-cpu = Chip8Cpu(state, lambda: randrange(0x00, 0x100), gpu)
-cpu.schip = options['schip']
+rng = Random(seed)
+cpu = Chip8Cpu(state, lambda: rng.randrange(0x00, 0x100), gpu)
+cpu.schip = schip
+cpu.sound_edges = []
+set_speed(cycles_per_frame)
+if options['replay']:
+    player = Player(recording.events, state.keys)
+recorder = None
+if options['record']:
+    recorder = Recorder(state.keys, seed, schip, cycles_per_frame)
+profiler = None
+if options['profile']:
+    profiler = Chip8Profiler()
+    profiler.attach(cpu)
+painter = Chip8Screen(screen, scale, screen_area,
+                      profiler.timed if profiler is not None else None)
+history = Chip8Rewind(options['rewind_memory'])
+frames = Chip8FrameBuffer()
+emulation = FrameScheduler(FRAME_RATE)
+display = FrameScheduler(DISPLAY_RATE, 1)
 key_numbers = load_keys()
+key_index = KeyIndex(key_numbers)
 reset()
+startup.mark('program')
 
 playing = True
+idle = False
+rewinding = False
+fast_forward = False
+step = False
 while playing:
-    step = not options['stop_every_frame']
-    for event in pygame.event.get():
+    for event in get_events(idle and player is None):
         if event.type == pygame.QUIT:
             playing = False
+        elif event.type == pygame.VIDEOEXPOSE:
+            frames.dirty_rows = ALL_ROWS
         elif event.type == pygame.KEYDOWN:
-            command = get_command(event)
-            if command == 'step':
-                step = True
-            elif command == 'reset':
-                reset()
-            elif command is not None:
-                state.keys[command] = True
+            for command in get_commands(event):
+                if command == 'step':
+                    step = True
+                elif command == 'reset':
+                    if not is_session_locked('Resetting'):
+                        reset()
+                elif command == 'save_state':
+                    save_state()
+                elif command == 'load_state':
+                    if not is_session_locked('Loading a state'):
+                        load_state()
+                elif command == 'rewind':
+                    rewinding = not is_session_locked('Rewinding')
+                elif command == 'faster':
+                    change_speed(1)
+                elif command == 'slower':
+                    change_speed(-1)
+                elif command == 'fast_forward':
+                    fast_forward = True
+                elif isinstance(command, int) and player is None:
+                    state.keys[command] = True
         elif event.type == pygame.KEYUP:
-            command = get_command(event)
-            if command is not None:
-                state.keys[command] = False
-    if step:
-        simulate_cpu(cpu)
-
-    sound_playing = update_sound()
-    draw_screen(state)
-    pygame.display.update()
-    clock.tick(60)
+            for command in get_commands(event):
+                if command == 'rewind':
+                    rewinding = False
+                elif command == 'fast_forward':
+                    fast_forward = False
+                    emulation.reset()
+                elif isinstance(command, int) and player is None:
+                    state.keys[command] = False
+    if fast_forward:
+        due = options['fast_forward']
+    else:
+        due = emulation.due_frames()
+    start_cycles = state.cycles
+    for _ in range(due):
+        if rewinding:
+            rewind_frame()
+            idle = False
+        elif step or not options['stop_every_frame']:
+            step = False
+            idle = run_frame()
+        else:
+            idle = True
+    if state.dirty_rows:
+        frames.publish(state)
+
+    schedule_sound(start_cycles, fast_forward)
+    update_sound()
+    if display.due_frames():
+        rects = painter.draw(frames)
+        if rects:
+            pygame.display.update(rects)
+            if startup is not None:
+                startup.mark('first frame')
+                if options['startup_times']:
+                    stderr.write(startup.to_text())
+                startup = None
+    if not fast_forward:
+        wait_for_next_frame()
 
 save_keys()
+if recorder is not None:
+    save_recording(recorder.recording, options['record'])
+if profiler is not None:
+    profiler.save(options['profile'])
 pygame.quit()